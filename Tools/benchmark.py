@@ -0,0 +1,344 @@
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Generates synthetic timelines in the layout get_events() reads, converts them with tiki-toki.py,
+# and keeps the results so the speed and memory use of different versions can be compared.
+#
+#     python Tools/benchmark.py --rows 1000 10000 100000
+#
+# Each run is appended as a line of JSON to the results file, with the rows per second, the peak memory use,
+# and the time of each stage as reported by --profile-json, for versions of the converter that have it.
+# With --memory, how many bytes each event takes up once read is measured as well
+
+# The directory of the repository, which holds the converter, settings.txt, and res/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADER = ["Event Title", "Date", "Intro Text", "Full Description", "Category", "Media", "Tag", "Span"]
+# Words the synthetic text is made of, including the modifiers format_text_block replaces
+WORDS = ["dinosaur", "fossil", "&tab;", "extinction", "meteor", "\n", "jurassic", "<b>bold</b>", "ice", "age"]
+# Reads a csv file with the converter in its own process, and prints how much memory the events and spans hold.
+# The events are all kept in memory instead of being sorted in runs on disk, so every one of them is measured
+MEMORY_SCRIPT = """
+import json, os, sys, tracemalloc
+from contextlib import redirect_stdout
+sys.path.insert(0, os.getcwd())
+import tiki_toki
+
+class KeepAll(tiki_toki.EventSorter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(sys.maxsize)
+
+tiki_toki.EventSorter = KeepAll
+builder = tiki_toki.TimelineBuilder(on_error = "continue")
+tracemalloc.start()
+with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+    events, spans = builder.get_events(sys.argv[1])
+print(json.dumps({"events": len(events), "bytes": tracemalloc.get_traced_memory()[0]}))
+"""
+
+
+def main(argv):
+    """
+    Parses the command line arguments and runs the benchmarks
+
+    :param list argv: The command line arguments, without the script name
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks tiki-toki.py on synthetic timelines")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], metavar="N",
+                        help="The number of rows of each timeline to benchmark (default: 1000 10000)")
+    parser.add_argument("--bc-share", type=float, default=0.1, metavar="SHARE",
+                        help="Share of the events with BC dates (default: 0.1)")
+    parser.add_argument("--media-share", type=float, default=0.3, metavar="SHARE",
+                        help="Share of the events with an image (default: 0.3)")
+    parser.add_argument("--tag-share", type=float, default=0.5, metavar="SHARE",
+                        help="Share of the events with tags (default: 0.5)")
+    parser.add_argument("--max-tags", type=int, default=3, metavar="N",
+                        help="Most tags an event can have (default: 3)")
+    parser.add_argument("--span-share", type=float, default=0.02, metavar="SHARE",
+                        help="Share of the events with a span (default: 0.02)")
+    parser.add_argument("--duplicate-share", type=float, default=0.05, metavar="SHARE",
+                        help="Share of the events on the same date as an earlier one (default: 0.05)")
+    parser.add_argument("--images", type=int, default=50, metavar="N",
+                        help="Number of different images the events use (default: 50)")
+    parser.add_argument("--image-kb", type=int, default=256, metavar="KB",
+                        help="Size of each image (default: 256)")
+    parser.add_argument("--categories", type=int, default=10, metavar="N",
+                        help="Number of categories in the settings (default: 10)")
+    parser.add_argument("--tags", type=int, default=20, metavar="N",
+                        help="Number of tags in the settings (default: 20)")
+    parser.add_argument("--duplicate-dates", default="offset",
+                        help="Passed on to the converter (default: offset)")
+    parser.add_argument("--columnar", action="store_true",
+                        help="Passed on to the converter, to benchmark reading the csv files a column at a time")
+    parser.add_argument("--compact", action="store_true",
+                        help="Passed on to the converter, to benchmark writing compact JSON")
+    parser.add_argument("--json-encoder", metavar="ENCODER",
+                        help="Passed on to the converter with --compact, such as json or orjson")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the generated data (default: 1)")
+    parser.add_argument("--tree", default=REPO_DIR, metavar="DIR",
+                        help="The version of the converter to benchmark (default: this repository)")
+    parser.add_argument("--label", help="Name of the version in the results (default: from git)")
+    parser.add_argument("--results", default=os.path.join(REPO_DIR, "Tools", "benchmark_results.jsonl"),
+                        metavar="FILE",
+                        help="File the results are appended to (default: Tools/benchmark_results.jsonl)")
+    parser.add_argument("--keep", metavar="DIR",
+                        help="Generate the timelines in this directory and keep them, instead of a temporary one")
+    parser.add_argument("--memory", action="store_true",
+                        help="Also measure how many bytes each event takes up in memory once read")
+    args = parser.parse_args(argv)
+
+    label = args.label or git_version(args.tree)
+    work_dir = args.keep or tempfile.mkdtemp(prefix = "tiki-toki-benchmark-")
+    try:
+        prepare_workspace(work_dir, args)
+        print("{:>10}{:>12}{:>14}{:>16}{}".format("Rows", "Seconds", "Rows/second", "Peak RSS (MB)",
+                                               "{:>14}".format("Bytes/event") if args.memory else ""))
+        for rows in args.rows:
+            csv_name = "benchmark_{}.csv".format(rows)
+            generate_csv(os.path.join(work_dir, csv_name), rows, args)
+            result = run_converter(work_dir, csv_name, args.duplicate_dates, args.columnar, args.compact,
+                                   args.json_encoder)
+            if args.memory:
+                result["bytes_per_event"] = measure_memory(work_dir, csv_name)
+            result.update({
+                "time"   : datetime.now().isoformat(timespec = "seconds"),
+                "label"  : label,
+                "rows"   : rows,
+                "options": {key: value for key, value in vars(args).items()
+                            if key not in ("rows", "tree", "label", "results", "keep", "memory")}
+            })
+            print("{:>10}{:>12.2f}{:>14.0f}{:>16.1f}{}".format(
+                    rows, result["seconds"], result["rows_per_second"], result["peak_rss_kb"] / 1024,
+                    "{:>14}".format(result["bytes_per_event"] or "-") if args.memory else ""))
+            with open(args.results, "a") as results_file:
+                results_file.write(json.dumps(result) + "\n")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors = True)
+    print("Results appended to {}".format(args.results))
+    return 0
+
+
+def git_version(tree):
+    """
+    :param string tree: The directory of the converter
+    :rtype: string
+    :return: The git commit of the directory, "unknown" if it can't be found
+    """
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd = tree,
+                                       stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def prepare_workspace(work_dir, args):
+    """
+    Copies the converter into the directory, and generates the settings and images the timelines use
+
+    :param string work_dir: The directory the benchmarks run in
+    :param args: The command line arguments
+    """
+    os.makedirs(os.path.join(work_dir, "Timelines", "Generated"), exist_ok = True)
+    for name in os.listdir(args.tree):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(args.tree, name), work_dir)
+    generate_settings(os.path.join(work_dir, "settings.txt"), args.categories, args.tags)
+    generate_images(os.path.join(work_dir, "res"), args.images, args.image_kb, random.Random(args.seed))
+
+
+def generate_settings(settings_path, categories, tags):
+    """
+    Writes a settings file with the given number of categories and tags, and the rest copied from settings.txt
+
+    :param string settings_path: Where to write the settings file
+    :param int categories: The number of categories, named "Category 1" and so on
+    :param int tags: The number of tags, named "tag-1" and so on
+    """
+    with open(os.path.join(REPO_DIR, "settings.txt")) as template_file:
+        template = template_file.read()
+    with open(settings_path, "w") as settings_file:
+        settings_file.write("Categories\n")
+        for number in range(1, categories + 1):
+            settings_file.write("Category {:<12}{:06X}\n".format(number, number * 0x1F2E3D % 0xFFFFFF))
+        settings_file.write("\nTags\n")
+        for number in range(1, tags + 1):
+            settings_file.write("tag-{}\n".format(number))
+        settings_file.write("\n" + template[template.index("Colors"):])
+
+
+def generate_images(res_dir, count, size_kb, rng):
+    """
+    Writes images named image1.jpg and so on, each a copy of res/Dinosaur1.jpg made unique and padded to size
+    The padding comes after the end of the JPEG data, so each image is still a valid JPEG
+
+    :param string res_dir: The directory the images are written to
+    :param int count: The number of images
+    :param int size_kb: The size of each image, at least that of Dinosaur1.jpg
+    :param Random rng: Where the padding comes from
+    """
+    os.makedirs(res_dir, exist_ok = True)
+    with open(os.path.join(REPO_DIR, "res", "Dinosaur1.jpg"), "rb") as image_file:
+        image = image_file.read()
+    for number in range(1, count + 1):
+        padding = max(size_kb * 1024 - len(image), 16)
+        with open(os.path.join(res_dir, "image{}.jpg".format(number)), "wb") as image_file:
+            image_file.write(image)
+            image_file.write(bytes(rng.getrandbits(8) for _ in range(16)))
+            image_file.write(b"\0" * (padding - 16))
+
+
+def generate_csv(csv_path, rows, args):
+    """
+    Writes a csv file of synthetic events in the layout get_events() reads
+
+    :param string csv_path: Where to write the csv file
+    :param int rows: The number of events
+    :param args: The command line arguments, with the share of each kind of cell
+    """
+    rng = random.Random(args.seed + rows)
+    used_dates = []
+    with open(csv_path, "w", newline = "") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADER)
+        for number in range(1, rows + 1):
+            if used_dates and rng.random() < args.duplicate_share:
+                date = rng.choice(used_dates)
+            else:
+                bc = " BC" if rng.random() < args.bc_share else ""
+                date = csv_date(datetime(rng.randint(1, 9999), rng.randint(1, 12), rng.randint(1, 28))) + bc
+                used_dates.append(date)
+            media = ""
+            if args.images and rng.random() < args.media_share:
+                media = "image{}.jpg:: Caption {}:: {:.1f},{:.1f}".format(rng.randint(1, args.images), number,
+                                                                          rng.uniform(-1, 1), rng.uniform(-1, 1))
+            tags = ""
+            if args.tags and rng.random() < args.tag_share:
+                tags = ":: ".join("tag-{}".format(tag) for tag in
+                                  rng.sample(range(1, args.tags + 1), rng.randint(1, min(args.max_tags, args.tags))))
+            span = ""
+            if rng.random() < args.span_share:
+                start = datetime(rng.randint(1, 9000), rng.randint(1, 12), rng.randint(1, 28))
+                end = start + timedelta(days = rng.randint(1, 3650))
+                span = "{}:: {}:: Span {}:: #{:06X}:: 50:: #FFF".format(csv_date(start), csv_date(end), number,
+                                                                        rng.randint(0, 0xFFFFFF))
+            writer.writerow(["Event {}".format(number), date, text(rng, 8), text(rng, rng.randint(20, 200)),
+                             "Category {}".format(rng.randint(1, args.categories)), media, tags, span])
+
+
+def csv_date(date):
+    """
+    :param datetime date: The date to write
+    :rtype: string
+    :return: The date in the default format of the converter, which strftime doesn't pad years before 1000 to
+    """
+    return "{:02d}/{:02d}/{:04d}".format(date.month, date.day, date.year)
+
+
+def text(rng, words):
+    """
+    :param Random rng: Where the words are picked from
+    :param int words: The number of words
+    :rtype: string
+    :return: Synthetic text
+    """
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def run_converter(work_dir, csv_name, duplicate_dates, columnar=False, compact=False, json_encoder=None):
+    """
+    Converts a csv file with tiki-toki.py, measuring the time and peak memory use of the whole process
+
+    :param string work_dir: The directory the converter and timeline are in
+    :param string csv_name: The name of the csv file
+    :param string duplicate_dates: How events on the same date are handled by the converter
+    :param bool columnar: Whether the converter reads the csv file a column at a time
+    :param bool compact: Whether the converter writes compact JSON
+    :param string json_encoder: Optional- What the converter encodes compact JSON with
+    :rtype: dict
+    :return: The measurements
+    """
+    output_dir = os.path.join(work_dir, "Timelines", "Generated")
+    # Only the timelines are removed, the converter also keeps its caches here
+    for name in os.listdir(output_dir):
+        if name.endswith(".tki"):
+            os.remove(os.path.join(output_dir, name))
+    command = [sys.executable, "tiki-toki.py", csv_name, "--on-error", "continue",
+               "--duplicate-dates", duplicate_dates]
+    if columnar:
+        command.append("--columnar")
+    if compact:
+        command.append("--compact")
+    if json_encoder:
+        command += ["--json-encoder", json_encoder]
+    profile_path = os.path.join(work_dir, "profile.json")
+    # Older versions of the converter can't report their stages
+    with open(os.path.join(work_dir, "tiki-toki.py"), encoding = "utf-8-sig") as script_file:
+        script = script_file.read()
+    if os.path.isfile(os.path.join(work_dir, "tiki_toki.py")):
+        with open(os.path.join(work_dir, "tiki_toki.py"), encoding = "utf-8-sig") as module_file:
+            script += module_file.read()
+    profiled = "--profile-json" in script
+    if profiled:
+        command += ["--profile-json", profile_path]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd = work_dir, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE)
+    # wait4 gives the peak memory of this process alone, where it is available
+    if hasattr(os, "wait4"):
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    else:
+        stderr = process.communicate()[1]
+        peak_rss_kb = 0
+    seconds = time.perf_counter() - start
+    # Exits with 1 for a timeline that was converted with errors, such as an invalid synthetic date
+    if process.returncode not in (0, 1):
+        raise RuntimeError("The converter failed on {}:\n{}".format(csv_name, stderr.decode(errors = "replace")))
+
+    result = {
+        "seconds"       : round(seconds, 6),
+        "rows_per_second": round(int(csv_name.split("_")[1].split(".")[0]) / seconds, 1),
+        "peak_rss_kb"   : peak_rss_kb,
+        "output_bytes"  : sum(os.path.getsize(os.path.join(output_dir, name)) for name in os.listdir(output_dir)
+                              if name.endswith(".tki")),
+        "stages"        : {}
+    }
+    if profiled:
+        with open(profile_path) as profile_file:
+            result["stages"] = json.load(profile_file)["stages"]
+    return result
+
+
+def measure_memory(work_dir, csv_name):
+    """
+    Reads a csv file with the converter in its own process, measuring the memory its events and spans hold
+
+    :param string work_dir: The directory the converter and timeline are in
+    :param string csv_name: The name of the csv file
+    :rtype: int
+    :return: The bytes per event, None for versions of the converter without TimelineBuilder and EventSorter
+    """
+    process = subprocess.run([sys.executable, "-c", MEMORY_SCRIPT, csv_name], cwd = work_dir,
+                             stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+    if process.returncode != 0:
+        if b"AttributeError" in process.stderr:
+            return None
+        raise RuntimeError("Measuring the memory of {} failed:\n{}".format(
+                csv_name, process.stderr.decode(errors = "replace")))
+    measured = json.loads(process.stdout.decode().splitlines()[-1])
+    return round(measured["bytes"] / max(measured["events"], 1))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
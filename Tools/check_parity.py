@@ -0,0 +1,229 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Converts a csv file in the ways that should give the same timeline, and checks that they do:
+#
+#     python Tools/check_parity.py
+#
+#  - Reading it a row at a time, and a column at a time with --columnar, gives the same .tki file and the same
+#    errors, for every --on-error and --duplicate-dates policy that runs without prompts
+#  - Building the first half of its rows and adding the rest with --merge gives the same .tki file as building
+#    all of them at once
+#  - The same rows in a tsv or JSON Lines file give the same .tki file and errors
+#
+# The default file, Tools/fixtures/mixed.csv, has a bit of everything the converter checks: misformatted, BC,
+# and duplicate dates, undefined categories and tags, missing media, bad thumb positions, spans with errors,
+# and rows without a title or subtitle
+
+# The directory of the repository, which holds the converter, settings.txt, and res/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ON_ERROR_POLICIES = ("continue", "skip-row")
+DUPLICATE_DATE_POLICIES = ("reject", "allow", "offset")
+# The other formats the rows are written in, by their extension
+FORMATS = (".tsv", ".jsonl")
+
+
+def main(argv):
+    """
+    Parses the command line arguments and runs the checks
+
+    :param list argv: The command line arguments, without the script name
+    :rtype: int
+    :return: 0 if every check passed, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Checks that tiki-toki.py gives the same timeline in every mode")
+    parser.add_argument("csv_file", nargs="?", default=os.path.join(REPO_DIR, "Tools", "fixtures", "mixed.csv"),
+                        help="The csv file to convert (default: Tools/fixtures/mixed.csv)")
+    parser.add_argument("--tree", default=REPO_DIR, metavar="DIR",
+                        help="The version of the converter to check (default: this repository)")
+    parser.add_argument("--keep", metavar="DIR",
+                        help="Convert the files in this directory and keep them, instead of a temporary one")
+    args = parser.parse_args(argv)
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix = "tiki-toki-parity-")
+    failures = 0
+    try:
+        columnar = has_numpy()
+        if not columnar:
+            print("NumPy isn't installed, so --columnar is left out")
+        for on_error in ON_ERROR_POLICIES:
+            for duplicate_dates in DUPLICATE_DATE_POLICIES:
+                options = ["--on-error", on_error, "--duplicate-dates", duplicate_dates]
+                name = "-".join([on_error, duplicate_dates])
+                full = convert(args.tree, os.path.join(work_dir, name), [args.csv_file], options)
+                if columnar:
+                    columns = convert(args.tree, os.path.join(work_dir, name + "-columnar"), [args.csv_file],
+                                      options + ["--columnar"])
+                    failures += report("--columnar " + " ".join(options), full, columns)
+                merged = merge(args.tree, os.path.join(work_dir, name + "-merge"), args.csv_file, options)
+                # The IDs of the errors of the rows that were merged start over, so only the timelines are compared
+                failures += report("--merge " + " ".join(options), full[:1], merged[:1])
+                for extension in FORMATS:
+                    other = convert_as(args.tree, os.path.join(work_dir, name + extension.replace(".", "-")),
+                                       args.csv_file, extension, options)
+                    failures += report(extension + " " + " ".join(options), without_file(full), without_file(other))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors = True)
+    print("{} checks differed".format(failures) if failures else "Every check gave the same timeline")
+    return 1 if failures else 0
+
+
+def has_numpy():
+    """
+    :rtype: bool
+    :return: Whether NumPy can be imported by the converter
+    """
+    return subprocess.run([sys.executable, "-c", "import numpy"], stdout = subprocess.DEVNULL,
+                          stderr = subprocess.DEVNULL).returncode == 0
+
+
+def prepare_workspace(tree, work_dir):
+    """
+    Copies the converter, its settings, and its media into the directory
+
+    :param string tree: The directory of the converter
+    :param string work_dir: The directory the files are converted in
+    """
+    os.makedirs(os.path.join(work_dir, "Timelines", "Generated"), exist_ok = True)
+    for name in os.listdir(tree):
+        if name.endswith(".py") or name == "settings.txt":
+            shutil.copy(os.path.join(tree, name), work_dir)
+    shutil.copytree(os.path.join(tree, "res"), os.path.join(work_dir, "res"), dirs_exist_ok = True)
+
+
+def run_converter(work_dir, arguments):
+    """
+    Runs tiki-toki.py in the directory, with an error report
+
+    :param string work_dir: The directory the converter and csv files are in
+    :param list arguments: The command line arguments
+    :rtype: tuple
+    :return: The contents of the .tki file it wrote, None if it wrote none, and the list of errors
+    :raises RuntimeError: If the converter crashed, or wrote more than one .tki file
+    """
+    output_dir = os.path.join(work_dir, "Timelines", "Generated")
+    # The .tki files are named after the minute they are written in, so earlier ones are cleared out of the way
+    for name in os.listdir(output_dir):
+        if name.endswith(".tki"):
+            os.remove(os.path.join(output_dir, name))
+    report_path = os.path.join(work_dir, "errors.jsonl")
+    process = subprocess.run([sys.executable, "tiki-toki.py"] + arguments + ["--error-report", report_path],
+                             cwd = work_dir, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE)
+    if process.returncode not in (0, 1, 2) or process.stderr:
+        raise RuntimeError("Converting with {} failed:\n{}".format(
+                " ".join(arguments), process.stderr.decode(errors = "replace")))
+    written = [name for name in os.listdir(output_dir) if name.endswith(".tki")]
+    if len(written) > 1:
+        raise RuntimeError("Converting with {} wrote {} .tki files".format(" ".join(arguments), len(written)))
+    tki = None
+    if written:
+        with open(os.path.join(output_dir, written[0]), "rb") as tki_file:
+            tki = tki_file.read()
+    with open(report_path) as report_file:
+        errors = [json.loads(line) for line in report_file]
+    return tki, errors
+
+
+def convert(tree, work_dir, csv_files, options):
+    """
+    Converts csv files together in a directory of their own
+
+    :param string tree: The directory of the converter
+    :param string work_dir: The directory to convert them in
+    :param list csv_files: The paths of the csv files
+    :param list options: The other command line arguments
+    :rtype: tuple
+    :return: The .tki file and the errors, see run_converter
+    """
+    prepare_workspace(tree, work_dir)
+    for csv_file in csv_files:
+        shutil.copy(csv_file, work_dir)
+    return run_converter(work_dir, [os.path.basename(csv_file) for csv_file in csv_files] + options)
+
+
+def merge(tree, work_dir, csv_file, options):
+    """
+    Builds the first half of the rows of a csv file, then adds the other half to it with --merge
+
+    :param string tree: The directory of the converter
+    :param string work_dir: The directory to convert them in
+    :param string csv_file: The path of the csv file
+    :param list options: The other command line arguments
+    :rtype: tuple
+    :return: The merged .tki file and the errors of the second half, see run_converter
+    """
+    prepare_workspace(tree, work_dir)
+    with open(csv_file, newline = "", encoding = "utf-8") as whole_file:
+        rows = list(csv.reader(whole_file))
+    header, rows = rows[0], rows[1:]
+    for name, half in (("first.csv", rows[:len(rows) // 2]), ("second.csv", rows[len(rows) // 2:])):
+        with open(os.path.join(work_dir, name), "w", newline = "", encoding = "utf-8") as half_file:
+            csv.writer(half_file).writerows([header] + half)
+    first, errors = run_converter(work_dir, ["first.csv"] + options)
+    if first is None:
+        raise RuntimeError("The first half of {} has no events to merge into".format(csv_file))
+    first_path = os.path.join(work_dir, "first.tki")
+    with open(first_path, "wb") as first_file:
+        first_file.write(first)
+    return run_converter(work_dir, ["second.csv", "--merge", first_path] + options)
+
+
+def convert_as(tree, work_dir, csv_file, extension, options):
+    """
+    Writes the rows of a csv file in another format, and converts that file instead
+
+    :param string tree: The directory of the converter
+    :param string work_dir: The directory to convert it in
+    :param string csv_file: The path of the csv file
+    :param string extension: The format to write the rows in, one of FORMATS
+    :param list options: The other command line arguments
+    :rtype: tuple
+    :return: The .tki file and the errors, see run_converter
+    """
+    prepare_workspace(tree, work_dir)
+    with open(csv_file, newline = "", encoding = "utf-8") as whole_file:
+        rows = list(csv.reader(whole_file))
+    name = os.path.splitext(os.path.basename(csv_file))[0] + extension
+    with open(os.path.join(work_dir, name), "w", newline = "", encoding = "utf-8") as other_file:
+        if extension == ".tsv":
+            csv.writer(other_file, delimiter = "\t").writerows(rows)
+        else:
+            for row in rows[1:]:
+                other_file.write(json.dumps(dict(zip(rows[0], row))) + "\n")
+    return run_converter(work_dir, [name] + options)
+
+
+def without_file(results):
+    """
+    :param tuple results: The .tki file and the errors, see run_converter
+    :rtype: tuple
+    :return: The same results, without the name of the file in each error
+    """
+    tki, errors = results
+    return tki, [{key: value for key, value in error.items() if key != "file"} for error in errors]
+
+
+def report(name, expected, actual):
+    """
+    Prints whether a check gave the same results
+
+    :param string name: What was checked
+    :param tuple expected: The results it should give
+    :param tuple actual: The results it gave
+    :rtype: int
+    :return: 1 if they differ, 0 otherwise
+    """
+    differs = expected != actual
+    print("{:<10}{}".format("DIFFERS" if differs else "ok", name))
+    return int(differs)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,3508 @@
+﻿import argparse
+import base64
+import copy
+import cProfile
+import csv
+import functools
+import hashlib
+import heapq
+import io
+import json
+import os
+import pathlib
+import pickle
+import re
+import tempfile
+import threading
+import time
+import sys
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import GeneratorType
+
+try:
+    import resource
+# Not available on Windows, where peak memory use isn't measured
+except ImportError:
+    resource = None
+
+try:
+    from PIL import Image, ImageOps
+# Pillow is only needed to optimize images
+except ImportError:
+    Image = None
+
+try:
+    import numpy as np
+# NumPy is only needed to read csv files a column at a time
+except ImportError:
+    np = None
+
+try:
+    import orjson
+# orjson is only used to encode compact output faster, when it is installed
+except ImportError:
+    orjson = None
+
+try:
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+# openpyxl is only needed to read Excel workbooks
+except ImportError:
+    load_workbook = None
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# How events sharing a date are handled:
+# reject - Report an error, allow - Keep them as is, offset - Shift each duplicate forward by a second
+DUPLICATE_DATE_POLICIES = ("reject", "allow", "offset")
+# How errors in the csv file are handled when running without prompts:
+# fail - Produce no .tki file, skip-row - Leave out rows with errors, continue - Keep rows with errors
+ON_ERROR_POLICIES = ("fail", "skip-row", "continue")
+# How images are put in the .tki file:
+# embed - Every image is embedded as a data URI, external - Each distinct image is written once and linked to
+MEDIA_MODES = ("embed", "external")
+# Which library encodes the JSON of compact output:
+# auto - orjson if it is installed, json otherwise, json - The json module, orjson - orjson, which is faster
+JSON_ENCODERS = ("auto", "json", "orjson")
+# What date format the events appears in the CSV as, unless another is given
+DATE_FORMAT = "%m/%d/%Y"
+# Where the .tki files are written. Allows running the script from other directories
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "Timelines", "Generated")
+# Where settings files are kept once read and checked, so an unchanged file is loaded without being read again
+SETTINGS_CACHE_DIR = os.path.join(OUTPUT_DIR, "settings-cache")
+# The colors the settings file must give
+TIMELINE_COLORS = ("mainColour", "backgroundColour", "sliderBackgroundColour", "sliderTextColour",
+                   "sliderDetailsColour", "sliderDraggerColour", "headerBackgroundColour", "headerTextColour",
+                   "durHeadlineColour", "3Dcolor")
+
+
+def main(argv):
+    """
+    Parses the command line arguments and converts the given csv files
+
+    :param list argv: The command line arguments, without the script name
+    """
+    parser = argparse.ArgumentParser(description="Converts .csv files into Tiki-Toki .tki timelines")
+    parser.add_argument("csv_files", nargs="*",
+                        help="The files to convert: csv, tsv, JSON Lines (.jsonl), or Excel workbooks (.xlsx, .xlsm)")
+    parser.add_argument("--duplicate-dates", choices=DUPLICATE_DATE_POLICIES, default="reject",
+                        help="How to handle multiple events on the same date (default: reject)")
+    parser.add_argument("--media-cache", metavar="DIR",
+                        help="Directory to keep encoded media in between runs")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="Number of csv files to convert at once, each in its own process. Files with errors "
+                             "aren't converted unless --on-error says otherwise, since there is no prompt (default: 1)")
+    parser.add_argument("--on-error", choices=ON_ERROR_POLICIES,
+                        help="Run without prompts, handling errors in the csv files this way")
+    parser.add_argument("--error-report", metavar="FILE",
+                        help="Write every error as a line of JSON to this file")
+    parser.add_argument("--date-format", default=DATE_FORMAT, metavar="FORMAT",
+                        help="strptime format of the dates in the date column (default: %%m/%%d/%%Y)")
+    parser.add_argument("--span-date-format", metavar="FORMAT",
+                        help="strptime format of the dates in the span column (default: same as --date-format)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep a manifest next to each output file, and only reprocess rows and media that changed")
+    parser.add_argument("--part-events", type=int, metavar="N",
+                        help="Split each timeline into parts of at most N events")
+    parser.add_argument("--part-bytes", type=int, metavar="BYTES",
+                        help="Split each timeline into parts whose stories take up at most BYTES")
+    parser.add_argument("--part-years", type=int, metavar="YEARS",
+                        help="Split each timeline into parts that each cover less than YEARS years")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="Instead of converting files, keep running and convert csv files sent over HTTP")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on with --serve (default: 127.0.0.1)")
+    parser.add_argument("--max-image-size", type=parse_image_size, metavar="WIDTHxHEIGHT",
+                        help="Downscale images to fit within this size before embedding them (needs Pillow)")
+    parser.add_argument("--max-thumb-size", type=parse_image_size, metavar="WIDTHxHEIGHT",
+                        help="Downscale the thumbnails of audio files to fit within this size (needs Pillow)")
+    parser.add_argument("--jpeg-quality", type=int, metavar="QUALITY",
+                        help="Save images again as JPEG with this quality, 1 - 95 (needs Pillow, default: 85 "
+                             "when downscaling)")
+    parser.add_argument("--merge", metavar="TKI",
+                        help="Add the events of the csv files to this .tki file, keeping its events and media as "
+                             "they are, instead of starting a new timeline")
+    parser.add_argument("--media-mode", choices=MEDIA_MODES, default="embed",
+                        help="Embed every image in the .tki file, or write each distinct image once to "
+                             "Timelines/Generated/media and link to it (default: embed)")
+    parser.add_argument("--media-url", metavar="URL",
+                        help="Where the images are linked from with --media-mode external, such as the web address "
+                             "they are uploaded to (default: the media folder as a file:// URL)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write the .tki files without spaces or line breaks, and with non-ASCII text as UTF-8 "
+                             "rather than escaped, so they are smaller and load faster")
+    parser.add_argument("--json-encoder", choices=JSON_ENCODERS, default="auto",
+                        help="What encodes the JSON of --compact output: orjson, which is faster, the json module, "
+                             "or orjson only if it is installed (default: auto)")
+    parser.add_argument("--columnar", action="store_true",
+                        help="Read each csv file a column at a time, checking and sorting all of its rows at once, "
+                             "which is faster for very large files but holds every row in memory (needs NumPy)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print how long each stage of the conversion took, and how much it handled")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="Also write the profile as JSON to this file (implies --profile)")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="Also record the whole conversion with cProfile, writing the stats to this file "
+                             "(implies --profile)")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    partition = {"max_events": args.part_events, "max_bytes": args.part_bytes, "max_years": args.part_years}
+    if any(limit is not None and limit < 1 for limit in partition.values()):
+        parser.error("part limits must be at least 1")
+    if not any(partition.values()):
+        partition = None
+    if args.serve is not None and args.csv_files:
+        parser.error("csv files can't be given when using --serve")
+    # Each request is answered with a single timeline and its errors, so these have nothing to apply to
+    if args.serve is not None and (partition or args.incremental or args.error_report):
+        parser.error("--serve can't be used with part limits, --incremental, or --error-report")
+    if args.merge and (args.serve is not None or args.incremental):
+        parser.error("--merge can't be used with --serve or --incremental")
+    if load_workbook is None and any(TableReader.format_of(path) == "xlsx" for path in args.csv_files):
+        parser.error("reading Excel workbooks needs openpyxl, which can be installed with: pip install openpyxl")
+    if args.json_encoder != "auto" and not args.compact:
+        parser.error("--json-encoder can only be used with --compact")
+    if args.json_encoder == "orjson" and orjson is None:
+        parser.error("--json-encoder orjson needs orjson, which can be installed with: pip install orjson")
+    if args.columnar:
+        if np is None:
+            parser.error("--columnar needs NumPy, which can be installed with: pip install numpy")
+        if args.merge or args.incremental:
+            parser.error("--columnar can't be used with --merge or --incremental")
+    profiler = None
+    if args.profile or args.profile_json or args.cprofile:
+        if args.serve is not None:
+            parser.error("--profile can't be used with --serve")
+        profiler = Profiler(args.cprofile)
+    # Prompting for file names would block when running without prompts
+    if args.on_error and not args.csv_files and args.serve is None:
+        parser.error("csv files must be given when using --on-error")
+    image_optimizer = None
+    if args.max_image_size or args.max_thumb_size or args.jpeg_quality is not None:
+        if Image is None:
+            parser.error("optimizing images needs Pillow, which can be installed with: pip install pillow")
+        if args.jpeg_quality is not None and not 1 <= args.jpeg_quality <= 95:
+            parser.error("--jpeg-quality must be from 1 to 95")
+        image_optimizer = ImageOptimizer(args.max_image_size, args.jpeg_quality or 85, args.max_thumb_size)
+    media_cache = args.media_cache
+    # Incremental builds keep their encoded media next to the manifests, so unchanged media isn't encoded again
+    # Optimized images are also kept, since optimizing them takes much longer than encoding them
+    if (args.incremental or image_optimizer) and not media_cache:
+        media_cache = os.path.join(OUTPUT_DIR, "media-cache")
+    if args.media_url and args.media_mode != "external":
+        parser.error("--media-url can only be used with --media-mode external")
+    media_options = {"media_mode": args.media_mode, "media_url": args.media_url, "image_optimizer": image_optimizer,
+                     "media_cache_dir": media_cache}
+    date_formats = {"Start Date": args.date_format, "Span(s)": args.span_date_format or args.date_format}
+    # Every problem with the settings is listed before anything is converted
+    try:
+        timeline_settings = settings()
+    except ValueError as error:
+        print(error)
+        return 2
+    if args.serve is not None:
+        # Nobody is there to answer a prompt, so rows with errors are kept unless told otherwise
+        builder = TimelineBuilder(timeline_settings, args.duplicate_dates, args.on_error or "continue", date_formats,
+                                  columnar = args.columnar, compact = args.compact, json_encoder = args.json_encoder,
+                                  **media_options)
+        serve(builder, args.host, args.serve, args.jobs)
+        return 0
+    jobs = args.jobs
+    if profiler is not None:
+        # The stages are only measured in this process, so the files are converted here one at a time
+        jobs = 1
+        profiler.install()
+    try:
+        results = write_tki_file_from(args.csv_files, not args.compact, args.duplicate_dates, jobs, args.on_error,
+                                      partition, date_formats, args.incremental, timeline_settings, args.merge,
+                                      args.columnar, args.compact, args.json_encoder, media_options)
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+            print(profiler.report())
+            if args.profile_json:
+                with open(args.profile_json, "w", encoding = "utf-8") as profile_file:
+                    json.dump(profiler.to_dict(args.csv_files), profile_file, indent = 4)
+
+    errors = [error for tki_outputs, file_errors in results for error in file_errors]
+    if args.error_report:
+        with open(args.error_report, "w", encoding = "utf-8") as report_file:
+            for error in errors:
+                report_file.write(json.dumps(error) + "\n")
+    # 0 - Every file converted without errors, 1 - Files converted with errors, 2 - A file was not converted
+    if any(not tki_outputs and file_errors for tki_outputs, file_errors in results):
+        return 2
+    return 1 if errors else 0
+
+
+def write_tki_file_from(csv_input_list, beautify=True, duplicate_dates="reject", jobs=1, on_error=None,
+                        partition=None, date_formats=None, incremental=False, timeline_settings=None, merge=None,
+                        columnar=False, compact=False, json_encoder="auto", media_options=None):
+    """
+    Writes the string produced by generate_tki_string to the tki_output file
+    Output file is written by default in filepath Timelines/Generated/file.csv
+    TKI output file has by default form MM_DD_YY Hour-Minute
+
+    :param list csv_input_list: Contains the different csv files desiring to convert
+    :param bool beautify: Whether to beautify the outputted JSON
+    :param string duplicate_dates: How events on the same date are handled, one of DUPLICATE_DATE_POLICIES
+    :param int jobs: How many files are converted at once, each in its own worker process
+    :param string on_error: Optional- One of ON_ERROR_POLICIES to run without prompts, None to ask the user.
+        Files converted at once can't ask, so they are handled as "fail" if not given
+    :param dict partition: Optional- Limits to split each timeline into parts by, see partition_events
+    :param dict date_formats: Optional- The date format of each column with dates, see get_events
+    :param bool incremental: Whether to only reprocess the rows that changed since the last run, see Manifest
+    :param tuple timeline_settings: Optional- The settings, as returned by settings(). Read from file if not given
+    :param string merge: Optional- The path of a .tki file that the events of each csv file are added to
+    :param bool columnar: Whether to read the csv files a column at a time with NumPy, see get_event_columns
+    :param bool compact: Whether to write the JSON without spaces, and non-ASCII text as it is, see JsonEncoder
+    :param string json_encoder: What encodes compact JSON, one of JSON_ENCODERS
+    :param dict media_options: Optional- How media is written, as the media keyword arguments of TimelineBuilder
+    :rtype: list
+    :return: The paths of the .tki files and the list of errors for each csv file, see write_tki_part
+
+    .. note:: Timelines are recommended to have under 500 events, so use multiple .csv files
+        or give partition limits if over
+    """
+
+    if len(csv_input_list) < 1:
+        print("Usage: python <file.py> <file1.csv> <file2.csv> ...".format(csv_input_list))
+        csv_input_list = input("\nEnter csv file names separated by a space: ").split(" ")
+
+    parallel = jobs > 1 and len(csv_input_list) > 1
+    # Worker processes can't prompt, so a file with errors isn't converted unless on_error says otherwise
+    if parallel and on_error is None:
+        on_error = "fail"
+    # Settings are the same for every file, so they are only read once
+    builder = TimelineBuilder(timeline_settings if timeline_settings is not None else settings(), duplicate_dates,
+                              on_error, date_formats, partition, beautify, incremental, merge = merge,
+                              columnar = columnar, compact = compact, json_encoder = json_encoder,
+                              **(media_options or {}))
+    # Each file is numbered by its position in the list, so the output doesn't depend on the number of jobs
+    if parallel:
+        with ProcessPoolExecutor(max_workers = jobs) as pool:
+            futures = [pool.submit(builder.write_tki_part, file, num_file)
+                       for num_file, file in enumerate(csv_input_list, 1)]
+            results = []
+            for file, future in zip(csv_input_list, futures):
+                # A file that failed is reported on its own, so the results of the other files are kept
+                try:
+                    results.append(future.result())
+                except Exception as error:
+                    message = "{}: {}".format(type(error).__name__, error)
+                    print("Could not convert {}: {}".format(file, message))
+                    results.append(([], [{"file": file, "id": None, "column": None, "message": message}]))
+            return results
+    return [builder.write_tki_part(file, num_file) for num_file, file in enumerate(csv_input_list, 1)]
+
+
+def parse_image_size(size):
+    """
+    Reads an image size from the command line, as WIDTHxHEIGHT or a single number for both
+
+    :param string size: The size, such as 1600x1200 or 1600
+    :rtype: tuple
+    :return: The width and height
+    :raises ArgumentTypeError: If the size isn't in either form
+    """
+    match = re.match("^(\\d+)(?:x(\\d+))?$", size.strip())
+    if match is None or int(match.group(1)) < 1 or int(match.group(2) or 1) < 1:
+        raise argparse.ArgumentTypeError("{} is not a size such as 1600x1200 or 1600".format(size))
+    return int(match.group(1)), int(match.group(2) or match.group(1))
+
+
+def serve(builder, host="127.0.0.1", port=8000, jobs=1):
+    """
+    Keeps running and converts the csv files sent to it over HTTP, until interrupted
+    Starting up, reading the settings, and encoding the media only happen once, instead of once per conversion.
+    The conversions run in a pool of worker processes that stay alive between requests, each keeping its
+    encoded media and parsed dates, so converting an edited csv file again only redoes what changed
+
+    POST /convert with the csv file as the body, or with the JSON {"path": "file.csv"} to convert a file on disk.
+    The response is the .tki file, with the number of errors in the X-Error-Count header.
+    If the csv file can't be converted, the response is 422 with the JSON {"errors": [...]}, or 500 if converting it
+    failed unexpectedly
+
+    :param TimelineBuilder builder: The builder with the settings and options every request is converted with
+    :param string host: The address to listen on. Only localhost by default, since requests can name any file
+    :param int port: The port to listen on
+    :param int jobs: How many csv files are converted at once
+    """
+    with ProcessPoolExecutor(max_workers = jobs) as pool:
+        server = ThreadingHTTPServer((host, port), ConversionHandler)
+        server.builder = builder
+        server.pool = pool
+        print("Converting csv files sent to http://{}:{}/convert. Press Ctrl+C to stop".format(host, port))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of serve, passing each csv file on to the worker pool
+    """
+    # The file extension a request body is saved with, by its content type, csv for any other type
+    SUFFIXES = {
+        "text/tab-separated-values"                                        : ".tsv",
+        "application/x-ndjson"                                             : ".jsonl",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": ".xlsx"
+    }
+
+    def do_POST(self):
+        if self.path != "/convert":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        temp_path = None
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                request = json.loads(body.decode("utf-8"))
+                if not isinstance(request, dict):
+                    raise ValueError("the JSON must be an object")
+                csv_input = request["path"]
+                # Other values, such as a number, would be taken as a file descriptor instead of a path
+                if not isinstance(csv_input, str):
+                    raise ValueError("the path must be a string")
+            else:
+                # The csv file is read from disk, so the body is saved to a file of its own
+                content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+                temp_fd, temp_path = tempfile.mkstemp(suffix = self.SUFFIXES.get(content_type, ".csv"))
+                with os.fdopen(temp_fd, "wb") as temp_file:
+                    temp_file.write(body)
+                csv_input = temp_path
+            tki_output, errors = self.server.pool.submit(self.server.builder.convert, csv_input).result()
+        except (ValueError, KeyError) as error:
+            self.send_error(400, "Expected a csv file, or JSON with a path: {}".format(error))
+            return
+        except FileNotFoundError as error:
+            self.send_error(404, str(error))
+            return
+        # Anything else that went wrong while converting is still answered, instead of closing the connection
+        except Exception as error:
+            message = "{}: {}".format(type(error).__name__, error)
+            print("Could not convert the csv file of a request: " + message)
+            errors = [{"file": None, "id": None, "column": None, "message": message}]
+            self.send_response_body(500, "application/json", json.dumps({"errors": errors}), len(errors))
+            return
+        finally:
+            if temp_path is not None:
+                os.remove(temp_path)
+
+        if tki_output is None:
+            self.send_response_body(422, "application/json", json.dumps({"errors": errors}), len(errors))
+        else:
+            self.send_response_body(200, "application/javascript", tki_output, len(errors))
+
+    def send_response_body(self, status, content_type, text, error_count):
+        """
+        Sends a whole response
+
+        :param int status: The HTTP status code
+        :param string content_type: The type of the text
+        :param string text: The body of the response
+        :param int error_count: How many errors the csv file had
+        """
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Error-Count", str(error_count))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def iterencode_tki(metadata, indent=None, encoder=None):
+    """
+    Encodes the metadata piece by piece, giving the same text as json.dumps(metadata, indent=indent)
+    The header fields are encoded one at a time, and lists such as the stories one item at a time,
+    so at most one story is ever held as a string. Lists can also be given as generators, so that
+    each story is only built when it is written
+
+    :param dict metadata: The metadata produced by generate_tki_string
+    :param int indent: The indentation to beautify the JSON with, None for a single line
+    :param JsonEncoder encoder: Optional- Encodes each value, and decides the indentation and separators instead
+    :rtype: generator
+    :return: The strings that make up the JSON document, in order
+    """
+    encoder = encoder or JsonEncoder(indent)
+    indent = encoder.indent
+    item_separator = encoder.item_separator
+    key_separator = encoder.key_separator
+
+    def new_line(level):
+        return "" if indent is None else "\n" + " " * (indent * level)
+
+    def encode(value, level):
+        # Nested values are encoded on their own, so shift them to the level they sit at
+        encoded = encoder.encode(value)
+        return encoded if indent is None else encoded.replace("\n", new_line(level))
+
+    yield "{"
+    for count, (key, value) in enumerate(metadata.items()):
+        yield (item_separator if count else "") + new_line(1) + encoder.encode(key) + key_separator
+        if isinstance(value, (list, GeneratorType)):
+            item_count = 0
+            for item_count, item in enumerate(value, 1):
+                yield ("[" if item_count == 1 else item_separator) + new_line(2) + encode(item, 2)
+            # An empty list is written the same as json does
+            yield new_line(1) + "]" if item_count else "[]"
+        else:
+            yield encode(value, 1)
+    yield new_line(0) + "}"
+
+
+class JsonEncoder:
+    """
+    Encodes the values of a .tki file as JSON, keeping count of how long encoding took
+    Compact JSON has no spaces or line breaks, and non-ASCII text is written as it is rather than escaped,
+    so multilingual timelines are much smaller. It can be encoded with orjson, which is faster than json.
+    Otherwise the JSON is the same as json.dumps gives
+
+    :param int indent: The indentation to beautify the JSON with, None for a single line
+    :param bool compact: Whether to leave out the spaces, and write non-ASCII text as it is
+    :param string library: Optional- What encodes compact JSON, one of JSON_ENCODERS
+    """
+
+    def __init__(self, indent=None, compact=False, library="auto"):
+        self.indent = None if compact else indent
+        self.compact = compact
+        if library == "auto":
+            library = "json" if orjson is None else "orjson"
+        # orjson always writes compact JSON, so other JSON is left to json
+        if not compact:
+            library = "json"
+        self.library = library
+        self.item_separator = "," if compact or indent is not None else ", "
+        self.key_separator = ":" if compact else ": "
+        self.encoder = json.JSONEncoder(indent = self.indent, ensure_ascii = not compact,
+                                        separators = (self.item_separator, self.key_separator))
+        self.seconds = 0.0
+
+    def encode(self, value):
+        """
+        :param value: The value to encode
+        :rtype: string
+        :return: The JSON of the value
+        """
+        start = time.perf_counter()
+        if self.library == "orjson":
+            encoded = orjson.dumps(value).decode("utf-8")
+        else:
+            encoded = self.encoder.encode(value)
+        # The line and paragraph separators end a line of JavaScript, which the .tki file is, so are kept escaped
+        if self.compact and ("\u2028" in encoded or "\u2029" in encoded):
+            encoded = encoded.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+        self.seconds += time.perf_counter() - start
+        return encoded
+
+
+def partition_events(event_list, max_events=None, max_bytes=None, max_years=None, media_cache=None):
+    """
+    Splits the sorted events into consecutive parts in a single pass, starting a new part
+    whenever adding the next event would go over one of the limits
+    A part always has at least one event, even if that event alone goes over a limit
+
+    :param list event_list: The events, sorted by date
+    :param int max_events: Optional- The most events a part can have
+    :param int max_bytes: Optional- The most bytes the serialized stories of a part can take up
+    :param int max_years: Optional- The number of years a part must cover less than
+    :param MediaCache media_cache: Optional- What the media is measured with, Media.CACHE if not given
+    :rtype: generator
+    :return: Each part, as a list of events
+    """
+    # Number of seconds in a year, as counted by date_ordinal
+    year_length = 366 * 24 * 3600
+    part = []
+    part_bytes = 0
+    for event in event_list:
+        event_bytes = len(json.dumps(event.to_dict(media_cache))) if max_bytes else 0
+        if part and ((max_events and len(part) >= max_events) or
+                     (max_bytes and part_bytes + event_bytes > max_bytes) or
+                     (max_years and event.sort_key // year_length - part[0].sort_key // year_length >= max_years)):
+            yield part
+            part = []
+            part_bytes = 0
+        part.append(event)
+        part_bytes += event_bytes
+    if part:
+        yield part
+
+
+def build_metadata(event_list, timeline_spans, timeline_settings, imported=None, media_cache=None):
+    """
+    Builds the metadata of a timeline out of its events and spans
+    The stories are a generator, so each event is only turned into a story, with its media encoded,
+    when the metadata is written. The metadata can therefore only be written once
+
+    :param list event_list: The events of the timeline, sorted by date, or an EventSorter
+    :param list timeline_spans: The spans of the timeline
+    :param tuple timeline_settings: The settings, as returned by settings()
+    :param ImportedTimeline imported: Optional- The timeline the events were added to, whose settings, categories,
+        and tags are written instead
+    :param MediaCache media_cache: Optional- What the media is encoded or linked with, Media.CACHE if not given
+    :rtype: dict
+    :return: metadata
+    """
+    timeline_categories, timeline_tags, timeline_colors, timeline_settings = timeline_settings[:4]
+    if media_cache is None:
+        media_cache = Media.CACHE
+
+    def stories():
+        # Puts the correct ID on each event in the sorted list
+        for count, event in enumerate(media_cache.prefetched(event_list)):
+            event.id = count + 1
+            yield event.to_dict(media_cache)
+
+    if imported is not None:
+        # The fields of the imported timeline are kept as they were, other than its dates
+        metadata = dict(imported.header)
+        metadata["startDate"] = event_list[0].start_date
+        metadata["endDate"] = event_list[-1].start_date
+        metadata["categories"] = [category.to_dict() for category in imported.categories]
+        metadata["spans"] = [span.to_dict(media_cache) for span in timeline_spans]
+        metadata["tags"] = [tag.to_dict() for tag in imported.tags]
+        metadata["stories"] = stories()
+        return metadata
+
+    metadata = {
+        # User defined
+        "startDate"             : event_list[0].start_date,
+        "endDate"               : event_list[-1].start_date,
+        "urlFriendlyTitle"      : timeline_settings["title"].replace(" ", "-"),
+        # These need to be in a specific order
+        "settings3d"            : [
+            timeline_settings["3Dstatus"],
+            timeline_colors["3Dcolor"],
+            timeline_settings["3Dzoom"],
+            timeline_settings["3Dpanelsize"],
+            timeline_settings["3Dvanishpoint"],
+            timeline_settings["3Dtimelinewidth"],
+            timeline_settings["3Ddirection"],
+            timeline_settings["3Dsections"],
+            timeline_settings["3Dbgimageopacity"]
+        ],
+
+        "mainColour"            : timeline_colors["mainColour"],
+        "backgroundColour"      : timeline_colors["backgroundColour"],
+        "sliderBackgroundColour": timeline_colors["sliderBackgroundColour"],
+        "sliderTextColour"      : timeline_colors["sliderTextColour"],
+        "sliderDetailsColour"   : timeline_colors["sliderDetailsColour"],
+        "sliderDraggerColour"   : timeline_colors["sliderDraggerColour"],
+        "headerBackgroundColour": timeline_colors["headerBackgroundColour"],
+        "headerTextColour"      : timeline_colors["headerTextColour"],
+        "durHeadlineColour"     : timeline_colors["durHeadlineColour"],
+
+        "backgroundImage"       : timeline_settings["backgroundImage"].source(media_cache),
+        "backgroundImageDataUri": timeline_settings["backgroundImage"].data_uri(media_cache),
+        "backgroundImageCredit" : timeline_settings["backgroundImage"].media_credit,
+        "introImage"            : timeline_settings["introImage"].source(media_cache),
+        "introImageDataUri"     : timeline_settings["introImage"].data_uri(media_cache),
+        "introImageCredit"      : timeline_settings["introImage"].media_credit,
+
+        # Needed, but keeping generic
+        "feeds"                 : [],
+        "homePage"              : False,
+        "openReadMoreLinks"     : 1,
+        "storyDateStatus"       : 0,
+        "showTitleBlock"        : 1,
+        "storyDateFormat"       : "MMM ddnn, YYYY",
+        "topDateFormat"         : "WKD, MMMM ddnn, YYYY",
+        "sliderDateFormat"      : "auto",
+        "language"              : "english",
+        "htmlFormatting"        : 1,
+        "expander"              : "2",
+        "fontBase"              : '\\"Goudy Old Style\\", Garamond, \\"Big Caslon\\", \\"Times New Roman\\", serif;"',
+        "fontHead"              : '\\"Franklin Gothic Medium\\", \\"Franklin Gothic\\\", \\"ITC Franklin Gothic\\", Arial, sans-serif;"',
+        "fontBody"              : 'Arial, \\"Helvetica Neue\\", Helvetica, sans-serif;"',
+
+        # Not sure if needed
+        "autoPlay"              : "0,5,5",
+        "altFlickrImageUrl"     : "",
+        "showGroupAuthorNames"  : "0",
+        "showAdBlock"           : "false",
+        "authorName"            : "",
+        "id"                    : 1,
+        "accountType"           : "Teacher",
+        "feed"                  : "",
+        "embedHash"             : "7546004423",
+        "embed"                 : "false",
+        "secret"                : "false",
+        "bgStyle"               : "0",
+        "bgScale"               : 100,
+    }
+
+    for key in timeline_settings:
+        # Prevents images from being serialized
+        if key not in ("introImage", "backgroundImage") and "3D" not in key:
+            # All settings are named after their key, so just add them automatically
+            metadata[key] = timeline_settings[key]
+
+    metadata["settings3d"] = ",".join((str(x) for x in metadata["settings3d"]))
+
+    metadata["categories"] = [category.to_dict() for category in timeline_categories]
+    metadata["spans"] = [span.to_dict(media_cache) for span in timeline_spans]
+    metadata["tags"] = [tag.to_dict() for tag in timeline_tags]
+    metadata["stories"] = stories()
+
+    # print(json.dumps(metadata))
+    return metadata
+
+
+def settings(settings_path="settings.txt", cache_dir=SETTINGS_CACHE_DIR):
+    """
+    Gets the categories, tags, colors, and other settings from the settings file
+    Once read and checked, the settings are kept in cache_dir, and loaded from there as long as the settings file,
+    the images it names, and this script haven't changed since
+
+    :param string settings_path: The path of the settings file
+    :param string cache_dir: Optional- The directory the settings are kept in between runs, None to always read them
+    :rtype: tuple
+    :returns: list of the categories, list of tags, dictionary of colors, dictionary of other settings,
+        and dictionary of modifiers, see read_settings
+    :raises ValueError: If the settings file has errors
+    """
+    compiled_path = None
+    if cache_dir:
+        compiled_path = os.path.join(cache_dir, hashlib.sha1(os.path.abspath(settings_path).encode()).hexdigest() +
+                                     ".pickle")
+        try:
+            with open(compiled_path, "rb") as compiled_file:
+                compiled = pickle.load(compiled_file)
+            # Each source is stored as its fingerprint, which starts with its path
+            if all(MediaCache.fingerprint(source[0]) == source for source in compiled["sources"]):
+                return compiled["settings"]
+        # A missing or unreadable file, a source that is gone, or classes that changed since it was written,
+        # means reading the settings again
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+            pass
+
+    timeline_settings = read_settings(settings_path)
+    if compiled_path:
+        images = [value.media_file for value in timeline_settings[3].values()
+                  if isinstance(value, Media) and value.media_file]
+        sources = [MediaCache.fingerprint(path) for path in [__file__, settings_path] + images]
+        os.makedirs(cache_dir, exist_ok = True)
+        # Writes to a temporary file first, so other processes never load a partial file
+        file_descriptor, temporary_path = tempfile.mkstemp(".tmp", dir = cache_dir)
+        with os.fdopen(file_descriptor, "wb") as compiled_file:
+            pickle.dump({"sources": sources, "settings": timeline_settings}, compiled_file)
+        os.replace(temporary_path, compiled_path)
+    return timeline_settings
+
+
+def read_settings(settings_path="settings.txt"):
+    """
+    Reads in the categories, tags, colors, and other settings from the settings file, checking each of them
+    Categories and tags are numbered in the order they appear, starting from 1
+    The settings in the Other section are checked against SETTINGS_SCHEMA, and turned into their type
+
+    :param string settings_path: The path of the settings file
+    :rtype: tuple
+    :returns: list of the categories, list of tags, dictionary of colors, dictionary of other settings,
+        and dictionary of modifiers, see TextFormatter
+    :raises ValueError: If the settings file has errors, listing every one of them
+    """
+    categories = []
+    tags = []
+    colors = {}
+    settings = {}
+    modifiers = OrderedDict()
+    problems = []
+    cur_section = None
+    with open(settings_path) as settings_file:
+        for line_number, line in enumerate(settings_file, 1):
+            line = line.strip()
+            # Skip blank lines or lines starting with #
+            if not line or line.startswith("#"): continue
+            # Advance to the next section
+            if line in ("Categories", "Tags", "Modifiers", "Colors", "Other"):
+                cur_section = line
+                continue
+
+            try:
+                if cur_section == "Categories":
+                    # Splits line based on 2 or more spaces, allows for multi-word categories
+                    category = re.split("\\s{2,}", line)
+                    if len(category) != 2:
+                        raise ValueError('"{}" should be a category, then 2 or more spaces and its color'.format(line))
+                    categories.append(Category(category[0], category[1], len(categories) + 1))
+
+                elif cur_section == "Tags":
+                    tags.append(Tag(line, len(tags) + 1))
+
+                elif cur_section == "Modifiers":
+                    # Splits the shorthand from its replacement on the first 2 or more spaces, so either can have one
+                    modifier = re.split("\\s{2,}", line, 1)
+                    # Without a replacement, the shorthand is removed
+                    modifiers[modifier[0]] = modifier[1] if len(modifier) > 1 else ""
+
+                elif cur_section == "Colors":
+                    color = line.split(None, 1)
+                    if len(color) != 2:
+                        raise ValueError('"{}" should be a name, then its color'.format(line))
+                    # The color can be in quotes
+                    name, color = color[0], color[1].strip('"')
+                    Color(color)
+                    colors[name] = color
+
+                elif cur_section == "Other":
+                    setting = re.split("\\s{2,}", line, 1)
+                    # Without a value, the setting is left blank
+                    name, value = setting[0], setting[1] if len(setting) > 1 else ""
+                    settings[name] = SETTINGS_SCHEMA.get(name, Setting(None)).parse(name, value)
+
+                else:
+                    raise ValueError('"{}" is in no section, or an unknown one'.format(line))
+            except (ValueError, FileNotFoundError) as error:
+                problems.append("Line {}: {}".format(line_number, error))
+
+    problems.extend("{} has no color".format(name) for name in TIMELINE_COLORS if name not in colors)
+    problems.extend("{} is not set".format(name) for name, setting in SETTINGS_SCHEMA.items()
+                    if setting.required and name not in settings)
+    if problems:
+        raise ValueError("The settings file {} has errors:\n{}".format(settings_path, "\n".join(problems)))
+    return categories, tags, colors, settings, modifiers
+
+
+class TimelineBuilder:
+    """
+    Converts csv files into Tiki-Toki timelines
+    Holds everything a conversion needs: the settings, the registries of valid categories and tags,
+    and the event, media, and span IDs. Nothing is shared between builders besides the encodings of media written
+    with the same options, see MediaCache.for_options, so a long-running program
+    can import this module and convert as many timelines as it wants, each with its own builder,
+    or one after another with the same builder
+
+    :param tuple timeline_settings: Optional- The settings, as returned by settings(). Read from file if not given
+    :param string duplicate_dates: How events on the same date are handled, one of DUPLICATE_DATE_POLICIES
+    :param string on_error: Optional- One of ON_ERROR_POLICIES to run without prompts, None to ask the user
+    :param dict date_formats: Optional- The strptime format of the dates in the "Start Date" and "Span(s)"
+        columns, DATE_FORMAT for any column not given
+    :param dict partition: Optional- Keyword arguments of partition_events. Each timeline is one part if not given
+    :param bool beautify: Whether to beautify the outputted JSON
+    :param bool incremental: Whether to only reprocess the rows that changed since the last run, see Manifest
+    :param string output_dir: The directory the .tki files are written to
+    :param string merge: Optional- The path of a .tki file that the events of each csv file are added to, instead of
+        starting a new timeline, see ImportedTimeline
+    :param bool columnar: Whether to read the csv files a column at a time with NumPy, see get_event_columns
+    :param bool compact: Whether to write the JSON without spaces, and non-ASCII text as it is, instead of
+        beautified or not, see JsonEncoder
+    :param string json_encoder: What encodes compact JSON, one of JSON_ENCODERS
+    :param string media_mode: Whether images are embedded or written to the media folder of output_dir and linked to,
+        one of MEDIA_MODES
+    :param string media_url: Optional- Where the images are linked from when they are external, the media folder as a
+        file:// URL if not given
+    :param ImageOptimizer image_optimizer: Optional- How images are optimized before they are embedded or written
+    :param string media_cache_dir: Optional- The directory encoded media is kept in between runs
+    """
+    # The string notifying how different attributes are separated
+    SEPARATOR = ":: "
+    # The error recorded when every row was skipped, or the file only has a header
+    NO_EVENTS = "No events to write"
+    # The error recorded when a file has errors and the user, or on_error, chose not to continue
+    NOT_CONTINUED = "Not converted, since it has errors"
+
+    def __init__(self, timeline_settings=None, duplicate_dates="reject", on_error=None, date_formats=None,
+                 partition=None, beautify=True, incremental=False, output_dir=OUTPUT_DIR, merge=None, columnar=False,
+                 compact=False, json_encoder="auto", media_mode="embed", media_url=None, image_optimizer=None,
+                 media_cache_dir=None):
+        # Gets all of the different user-defined settings
+        self.timeline_settings = timeline_settings if timeline_settings is not None else settings()
+        self.duplicate_dates = duplicate_dates
+        self.on_error = on_error
+        self.date_formats = date_formats
+        self.partition = partition
+        self.beautify = beautify
+        self.incremental = incremental
+        self.output_dir = output_dir
+        self.merge = merge
+        self.columnar = columnar
+        self.compact = compact
+        self.json_encoder = json_encoder
+        self.media_mode = media_mode
+        self.media_url = media_url
+        self.image_optimizer = image_optimizer
+        self.media_cache_dir = media_cache_dir
+        # The timeline read from merge for the file being converted
+        self.imported = None
+        timeline_categories, timeline_tags = self.timeline_settings[:2]
+        # The valid category and tag choices, by name
+        self.categories = {category.str_name: category.category_int for category in timeline_categories}
+        self.tags = {tag.str_name: tag.tag_int for tag in timeline_tags if tag.str_name}
+        # Settings from before there were modifiers only have the defaults
+        self.modifiers = self.timeline_settings[4] if len(self.timeline_settings) > 4 else {}
+        self.text_formatter = TextFormatter.for_modifiers(self.modifiers)
+        # Defines the number of the id currently working with, to aid in error finding
+        self.num_id = 1
+        self.media_id = 0
+        self.span_id = 0
+
+    @property
+    def media_cache(self):
+        """
+        The cache the media of this builder is encoded with, shared with other builders with the same media options
+        Looked up rather than kept, so a builder sent to a worker process uses the cache of that process
+        """
+        media_dir = os.path.join(self.output_dir, "media") if self.media_mode == "external" else None
+        return MediaCache.for_options(self.media_cache_dir, self.image_optimizer, media_dir, self.media_url)
+
+    def write_tki_part(self, csv_input, num_file=1):
+        """
+        Converts a single csv file and writes it to its own .tki file, or to several if partition limits are given
+        The event, media, and span IDs start over for every file, so files can be converted in any order
+        With incremental, the output is named after the csv file instead of the time, with the manifest next to it
+
+        :param string csv_input: The name of the csv file to convert
+        :param int num_file: The part number of the file, used in the output file name
+        :rtype: tuple
+        :return: The list of paths of the .tki files written, and the list of errors found. No paths are given if the
+            file is empty, has no events, or has errors that the user or on_error chose not to continue after
+        :raises FileNotFoundError: If the csv file doesn't exist, when on_error is None
+        :raises ValueError: If the .tki file to merge into can't be read, when on_error is None
+        """
+        errors = []
+        manifest = None
+        csv_name = os.path.splitext(os.path.basename(csv_input))[0]
+        if self.incremental:
+            # Everything besides the row itself that decides what a row is turned into
+            context = json.dumps([sorted(self.categories.items()), sorted(self.tags.items()), self.date_formats,
+                                  list(self.modifiers.items())])
+            manifest = Manifest(os.path.join(self.output_dir, csv_name + ".manifest.json"), context)
+        try:
+            # Check if file is empty
+            if os.stat(csv_input).st_size == 0:
+                print("{} is empty".format(csv_input))
+                errors.append({"file": csv_input, "id": None, "column": None, "message": self.NO_EVENTS})
+                return [], errors
+            # Gets all the data to write to the files
+            parts = self.generate_tki_parts(csv_input, errors, manifest)
+        except (TypeError, FileNotFoundError, ValueError) as error:
+            print("\nNothing returned from method generate_tki_string()\nHalting execution: no .tki file produced")
+            # Not continuing after errors is a choice, so the file is reported as not converted rather than raised
+            if isinstance(error, TypeError):
+                errors.append({"file": csv_input, "id": None, "column": None, "message": self.NOT_CONTINUED})
+                return [], errors
+            if self.on_error is None:
+                raise error
+            # Without prompts, a missing or unreadable file is reported like any other error
+            if isinstance(error, (FileNotFoundError, ValueError)):
+                print(error)
+                errors.append({"file": csv_input, "id": None, "column": None, "message": str(error)})
+            return [], errors
+
+        tki_outputs = []
+        for num_part, metadata in enumerate(parts, 1):
+            time_generated = time.strftime("%m_%d_%y %H-%M")
+            print("Time of file generation: " + time_generated)
+            # Parts split from the same file are numbered after the file, such as Part 1-2
+            part_name = num_file if self.partition is None else "{}-{}".format(num_file, num_part)
+            # Goes to the filepath Timelines/Generated/file.csv
+            tki_output = os.path.join(self.output_dir, "test {} Part {}.tki".format(time_generated, part_name))
+            # Incremental output keeps the same name between runs
+            if manifest is not None:
+                part_name = "" if self.partition is None else " Part {}".format(num_part)
+                tki_output = os.path.join(self.output_dir, "{}{}.tki".format(csv_name, part_name))
+            # Compact output holds non-ASCII text as it is, which is written as UTF-8 whatever the locale
+            with open(tki_output, 'w', encoding = "utf-8") as output_file:
+                encoder = self.write_tki(metadata, output_file)
+            print("Wrote {} bytes, encoding the JSON with {} in {:.3f} seconds".format(
+                    os.path.getsize(tki_output), encoder.library, encoder.seconds))
+            tki_outputs.append(tki_output)
+        if not tki_outputs:
+            print("{}: {}\nHalting execution: no .tki file produced".format(csv_input, self.NO_EVENTS))
+            errors.append({"file": csv_input, "id": None, "column": None, "message": self.NO_EVENTS})
+            return [], errors
+
+        if manifest is not None:
+            manifest.save()
+            print("Reused {} unchanged rows from {}".format(manifest.reused, manifest.path))
+        return tki_outputs, errors
+
+    def convert(self, csv_input):
+        """
+        Converts a single csv file into the text of a .tki file, without writing it anywhere
+
+        :param string csv_input: The name of the csv file to convert
+        :rtype: tuple
+        :return: The text of the .tki file, None if not continuing after errors or if there are no events,
+            and the list of errors
+        :raises FileNotFoundError: If the csv file doesn't exist
+        """
+        errors = []
+        try:
+            metadata = self.generate_tki_string(csv_input, errors)
+        # The timeline was not generated, since there were errors and on_error said not to continue
+        except TypeError:
+            return None, errors
+        # Nothing is left to write, such as when the file only has a header
+        except ValueError as error:
+            errors.append({"file": csv_input, "id": None, "column": None, "message": str(error)})
+            return None, errors
+        output_file = io.StringIO()
+        self.write_tki(metadata, output_file)
+        return output_file.getvalue(), errors
+
+    def write_tki(self, metadata, output_file):
+        """
+        Writes a timeline to a file, streaming it so the whole JSON string is never held in memory
+
+        :param dict metadata: The metadata of the timeline, from generate_tki_string or generate_tki_parts
+        :param output_file: The open text file to write to
+        :rtype: JsonEncoder
+        :return: The encoder used, with how long encoding took
+        """
+        encoder = JsonEncoder(4 if self.beautify and not self.compact else None, self.compact, self.json_encoder)
+        output_file.write("var TLTimelineData = ")
+        # Output the file, based on whether it should be beautified
+        for chunk in iterencode_tki(metadata, encoder = encoder):
+            output_file.write(chunk)
+        return encoder
+
+    def generate_tki_string(self, csv_input, errors=None):
+        """
+        Generates the string to be written to the output file
+
+        Includes:
+            - The metadata of the file
+            - The opening metadata, which includes:
+                - List of valid categories with colors, in timeline_categories
+                - The various relevant settings, stored in timeline_settings
+                - The colors of the timeline, stored in timeline_colors
+            - All of the event data, in event_list
+            - The closing metadata, which includes:
+                - List of valid tags, in timeline_tags
+                - List of valid spans, in timeline_spans
+
+        :param string csv_input: The name of the file to generate the .tki string from
+        :param list errors: Optional- The list that errors found in the csv file are added to
+        :rtype: dict
+        :return: metadata
+        :raises ValueError: If there are no events, since a timeline's dates are those of its first and last events
+        """
+        event_list, timeline_spans = self.read_timeline(csv_input, errors)
+        if not len(event_list):
+            raise ValueError(self.NO_EVENTS)
+        return build_metadata(event_list, timeline_spans, self.timeline_settings, self.imported, self.media_cache)
+
+    def generate_tki_parts(self, csv_input, errors=None, manifest=None):
+        """
+        Generates the metadata of each part the timeline is split into, in order
+        Each part has its own start and end date, and only the spans that overlap it
+        The csv file is read straight away, so errors are raised here, and each part is only built when it is asked for
+
+        :param string csv_input: The name of the file to generate the .tki string from
+        :param list errors: Optional- The list that errors found in the csv file are added to
+        :param Manifest manifest: Optional- Where unchanged rows are taken from and processed rows are remembered
+        :rtype: generator
+        :return: The metadata of each part, none if there are no events
+        :raises TypeError: If not continuing after errors in the csv file
+        """
+        event_list, timeline_spans = self.read_timeline(csv_input, errors, manifest)
+        media_cache = self.media_cache
+
+        def build_parts():
+            # A timeline without events has no dates, so nothing is built
+            if not len(event_list):
+                return
+            # Without limits the timeline is one part, and is left as it is instead of being read into a list
+            parts = (partition_events(event_list, media_cache = media_cache, **self.partition) if self.partition
+                     else [event_list])
+            for part in parts:
+                part_start, part_end = part[0].sort_key, part[-1].sort_key
+                part_spans = [span for span in timeline_spans if date_ordinal(span.start_date) <= part_end
+                              and date_ordinal(span.end_date) >= part_start]
+                yield build_metadata(part, part_spans, self.timeline_settings, self.imported, media_cache)
+        return build_parts()
+
+    def read_timeline(self, csv_input, errors=None, manifest=None):
+        """
+        Reads the events and spans from the csv file, with the events sorted by date
+
+        :param string csv_input: The name of the file to read
+        :param list errors: Optional- The list that errors found in the csv file are added to
+        :param Manifest manifest: Optional- Where unchanged rows are taken from and processed rows are remembered
+        :rtype: tuple
+        :return: The sorted events, as an EventSorter, and the list of spans
+        :raises TypeError: If not continuing after errors in the csv file
+        :raises ValueError: If the .tki file to merge into can't be read
+        """
+        self.imported = None
+        if self.merge:
+            self.imported = ImportedTimeline(self.merge)
+            self.imported.add_settings(self.timeline_settings)
+        event_list, timeline_spans = self.get_events(csv_input, errors, manifest, self.imported)
+        # The intro and background images are written with every timeline too, unless the imported ones are kept
+        images = set()
+        if self.imported is None:
+            images = {(value.media_file, False) for value in self.timeline_settings[3].values()
+                      if isinstance(value, Media)}
+        self.media_cache.prepare(self.media_files | images)
+        return event_list, timeline_spans
+
+    def get_events(self, csv_input, errors=None, manifest=None, imported=None):
+        """
+        Gets the cells of the CSV file, and puts them into their corresponding list of events
+        Since spans are independent of the events, the list of spans is returned separately
+        The file can also be a tsv, JSON Lines, or Excel file, see TableReader. Its columns are matched by their names,
+        or taken in the following order if the header doesn't name them:
+
+        +-------+------------+----------+------------------+----------+-------+--------+---------+
+        | Title | Start Date | Subtitle | Full Description | Category | Media | Tag(s) | Span(s) |
+        +=======+============+==========+==================+==========+=======+========+=========+
+        |       |            |          |                  |          |       |        |         |
+        +-------+------------+----------+------------------+----------+-------+--------+---------+
+
+        Can easily be expanded to include other attributes, such as an end date
+        The event, media, and span IDs start over every time a file is read, or after those of the imported timeline
+
+        :param string csv_input: The name of the file to generate the .tki string from
+        :param list errors: Optional- The list that errors are added to, each as a dictionary of the
+            file, event ID, column, and message
+        :param Manifest manifest: Optional- Where unchanged rows are taken from and processed rows are remembered
+        :param ImportedTimeline imported: Optional- A timeline whose events and spans the rows are added to, using
+            its categories and tags
+        :rtype: tuple
+        :return: The events, sorted by date as they are added to an EventSorter, and the spans present in the
+            timeline. None if not continuing after errors
+        :raises ValueError: If two events have the same date and self.duplicate_dates is "reject"
+        :raises KeyError:   If a category or tag is not in the list of valid ones
+
+        .. note:: Exceptions are handled by printing to console, and asking if user wishes to continue,
+            or following on_error if it is given
+        .. note:: With columnar, files read without a manifest or an imported timeline are read by get_event_columns
+        .. seealso:: Event
+        """
+        if self.columnar and manifest is None and imported is None:
+            return self.get_event_columns(csv_input, errors)
+        self.num_id = 1
+        self.media_id = imported.media_id if imported is not None else 0
+        self.span_id = imported.span_id if imported is not None else 0
+        if imported is not None:
+            # Rows refer to the categories and tags of the imported timeline, which has those of the settings too
+            self.categories = {category.str_name: category.category_int for category in imported.categories}
+            self.tags = {tag.str_name: tag.tag_int for tag in imported.tags if tag.str_name}
+        # The image files the events and spans embed, so they can be prepared before the timeline is written
+        self.media_files = set()
+        # The IDs of the events using each media file that can't be found, to list them once all rows are read
+        missing_media = OrderedDict()
+        # Each distinct media cell is only checked once, as the Media object its events copy or the error it raised
+        media_lookups = {}
+        # Holds every error that has occurred during execution while fetching event data
+        if errors is None:
+            errors = []
+        first_error = len(errors)
+
+        def log_error(column, message):
+            # Drops the ID from the message, since it is recorded on its own
+            errors.append({"file": csv_input, "id": self.num_id, "column": column,
+                           "message": re.sub("^ID \\d+: ", "", str(message))})
+
+        def report_error(column, message, missing_file=None):
+            log_error(column, message)
+            print("ID {}: {}".format(self.num_id, message))
+            if missing_file is not None:
+                missing_media.setdefault(missing_file, []).append(self.num_id)
+        # What date format the events and spans appear in the CSV as
+        date_formats = self.date_formats or {}
+        date_parser = DateParser.for_format(date_formats.get("Start Date", DATE_FORMAT))
+        span_date_parser = DateParser.for_format(date_formats.get("Span(s)", DATE_FORMAT))
+        # Holds the events, sorting them by date using the ordinal worked out when the event was read
+        events = imported.events if imported is not None else EventSorter()
+        spans = list(imported.spans) if imported is not None else []
+        # Maps each date already taken by an event to the ID of the first event on that date
+        date_registry = dict(imported.dates) if imported is not None else {}
+        # Maps a duplicated date to the number of seconds the last duplicate was offset by
+        date_offsets = {}
+
+        # Get path of the current directory. Allows running the script from other directories
+        csv_filepath = os.path.join(os.path.dirname(__file__), csv_input)
+        # The header line is skipped, and the cells put in the order below by their names
+        with TableReader(csv_filepath, date_parser.date_format) as reader:
+            for row in reader:
+                row_errors = len(errors)
+                # The media and span IDs before the row, given back if the row is left out
+                row_ids = self.media_id, self.span_id
+                date_key = None
+                title_cell = row[0]
+                start_date_cell = row[1]
+                subtitle_cell = row[2]
+                fulldesc_cell = row[3]
+                category_cell = row[4]
+                media_cell = row[5]
+                tag_cell = row[6]
+                span_cell = row[7]
+
+                # Prevents having events that have no title or subtitle
+                if not (title_cell and subtitle_cell): continue
+
+                # A row that hasn't changed since the last run is taken from the manifest instead of being processed
+                row_key = manifest.row_key(row) if manifest is not None else None
+                cached = manifest.get(row_key) if manifest is not None else None
+
+                # Events with a misformatted date are placed at the end of the timeline
+                sort_key = sys.maxsize
+                parsed_date = None
+                # The duplicated date and how far its duplicates were offset before the row, if the row is offset
+                offset_before = None
+                if cached is None:
+                    title_cell = self.text_formatter.format(title_cell)
+                    # Catches misformatted dates
+                    try:
+                        # Default Date format is 05/4/2012, 11/18/0020, etc.
+                        parsed_date = date_parser.parse(start_date_cell)
+                    except ValueError as error:
+                        log_error("Start Date", error)
+                        print("ID {}: {}".format(self.num_id, error))
+                else:
+                    title_cell = cached["title"]
+                    parsed_date = datetime(*cached["date"][0]), cached["date"][1]
+
+                # Catches multiple dates that match
+                if parsed_date is not None:
+                    try:
+                        start_date, is_bc = parsed_date
+                        bc_string = " BC" if is_bc else ""
+                        date_key = (bc_string, start_date)
+                        # Moves a duplicate forward one second at a time until it lands on a free date
+                        if self.duplicate_dates == "offset" and date_key in date_registry:
+                            offset = date_offsets.get(date_key, 0)
+                            offset_before = date_key, offset
+                            shifted_key = date_key
+                            while shifted_key in date_registry:
+                                offset += 1
+                                shifted_key = (bc_string, start_date + timedelta(seconds = offset))
+                            date_offsets[date_key] = offset
+                            date_key = shifted_key
+                            start_date = shifted_key[1]
+                        # Puts date in format that timeline software desires
+                        start_date_cell = format_date(start_date, bc_string)
+                        sort_key = date_ordinal(start_date, bc_string)
+                        # Check if there is already an event with this date, skipped entirely if duplicates are allowed
+                        if self.duplicate_dates != "allow":
+                            if date_key in date_registry:
+                                raise ValueError("Date {} already exists at ID {}".format(start_date_cell,
+                                                                                          date_registry[date_key]))
+                            date_registry[date_key] = self.num_id
+                    except ValueError as error:
+                        log_error("Start Date", error)
+                        print("ID {}: {}".format(self.num_id, error))
+
+                media_args = None
+                span_args = None
+                if cached is None:
+                    subtitle_cell = self.text_formatter.format(subtitle_cell)
+
+                    fulldesc_cell = self.text_formatter.format(fulldesc_cell)
+
+                    # Catches Categories not in the list of valid categories
+                    try:
+                        # Creates a category object out of the string defined for that event
+                        category_cell = self.category_int(category_cell.strip())
+                    except KeyError as error:
+                        category_cell = 0
+                        log_error("Category", error.args[0])
+                        print(error)
+
+                    if media_cell:
+                        media_args = media_cell.split(self.SEPARATOR)
+
+                    # Splits the different tags according to comma
+                    tag_cell = tag_cell.split(self.SEPARATOR)
+                    tag_string = ""
+                    # Catches tags not present in the list of valid tags
+                    try:
+                        for count, tag in enumerate(tag_cell):
+                            # Add the tag integer to the event
+                            tag_string += str(self.tag_int(tag.strip()))
+                            # Add comma to all but last event
+                            if count != len(tag_cell) - 1:
+                                tag_string += ","
+                    except KeyError as error:
+                        log_error("Tag(s)", error.args[0])
+                        print(error)
+                else:
+                    subtitle_cell = cached["subtitle"]
+                    fulldesc_cell = cached["fulldesc"]
+                    category_cell = cached["category"]
+                    media_args = cached["media"]
+                    tag_string = cached["tags"]
+
+                media_object = ""
+                if media_args:
+                    # Accounts for the possibility of no thumb position attribute
+                    thumb_pos = media_args[2] if len(media_args) == 3 else ""
+                    # Catches invalid file names, once for each distinct media cell
+                    media_key = tuple(media_args)
+                    if media_key not in media_lookups:
+                        try:
+                            media_lookups[media_key] = Media(media_args[0], media_args[1], thumb_pos,
+                                                             check_file = True)
+                            self.media_files.add((media_lookups[media_key].media_file,
+                                                  media_lookups[media_key].media_type == "Audio"))
+                        except (FileNotFoundError, ValueError, IndexError) as error:
+                            media_lookups[media_key] = error
+                    if isinstance(media_lookups[media_key], Exception):
+                        error = media_lookups[media_key]
+                        print("ID {}: {}".format(self.num_id, error))
+                        log_error("Media", error)
+                        if isinstance(error, FileNotFoundError):
+                            missing_media.setdefault(media_args[0], []).append(self.num_id)
+                    else:
+                        # Only media that is written is numbered, so a merged timeline can carry on after its IDs
+                        # Prevents empty media objects from incrementing media id
+                        if media_args[0]:
+                            self.media_id += 1
+                        media_object = copy.copy(media_lookups[media_key])
+                        media_object.media_id = self.media_id
+
+                # Creates the event, sharing the tags string with every other event that has the same tags
+                event = Event(self.num_id, title_cell, start_date_cell, start_date_cell, subtitle_cell,
+                              fulldesc_cell, category_cell, media_object, sys.intern(tag_string), sort_key)
+
+                # Checks for misformatted dates and colors
+                current_span, span_args = self.read_span(span_cell, span_date_parser, report_error,
+                                                         cached["span"] if cached is not None else None)
+
+                if self.on_error == "skip-row" and len(errors) > row_errors:
+                    print("ID {}: Leaving out this row because of its errors".format(self.num_id))
+                    self.media_id, self.span_id = row_ids
+                    # Frees the date of the row, so a later event can still use it
+                    if date_key is not None and date_registry.get(date_key) == self.num_id:
+                        del date_registry[date_key]
+                        # Including the date a duplicate was offset to, which the next duplicate is offset to instead
+                        if offset_before is not None:
+                            date_offsets[offset_before[0]] = offset_before[1]
+                else:
+                    events.add(event)
+                    if current_span:
+                        spans.append(current_span)
+
+                # Only rows without errors are remembered, so the errors are reported again on the next run
+                if manifest is not None and len(errors) == row_errors:
+                    files = []
+                    if media_object:
+                        files.append(os.path.join("res", media_object.media_name))
+                        if media_object.external_media_thumb:
+                            files.append(os.path.join("res", media_object.external_media_thumb))
+                    if current_span and current_span.bgimage.media_name:
+                        files.append(os.path.join("res", current_span.bgimage.media_name))
+                    manifest.put(row_key, {
+                        "title"   : title_cell,
+                        "date"    : [list(parsed_date[0].timetuple()[:6]), parsed_date[1]],
+                        "subtitle": subtitle_cell,
+                        "fulldesc": fulldesc_cell,
+                        "category": category_cell,
+                        "media"   : media_args,
+                        "tags"    : tag_string,
+                        "span"    : span_args
+                    }, files)
+
+                self.num_id += 1
+
+                # Loop end
+        # File closed
+
+        if not self.finish_reading(csv_input, len(errors) - first_error, missing_media): return
+        return events, spans
+
+    def get_event_columns(self, csv_input, errors=None):
+        """
+        Reads the csv file a column at a time, giving the same events, spans, and errors as get_events
+        Each distinct date, category, list of tags, and media cell is only checked once, and every row is then
+        checked at once with NumPy, from the codes of its cells. The events are sorted with a stable argsort, and
+        only built as they are read, see EventColumns. Every row is held in memory, rather than sorted in runs on disk
+
+        :param string csv_input: The name of the file to generate the .tki string from
+        :param list errors: Optional- The list that errors are added to, see get_events
+        :rtype: tuple
+        :return: The events, as EventColumns, and the spans present in the timeline. None if not continuing after errors
+        """
+        self.media_id = 0
+        self.span_id = 0
+        self.media_files = set()
+        if errors is None:
+            errors = []
+        first_error = len(errors)
+        date_formats = self.date_formats or {}
+        date_parser = DateParser.for_format(date_formats.get("Start Date", DATE_FORMAT))
+        span_date_parser = DateParser.for_format(date_formats.get("Span(s)", DATE_FORMAT))
+
+        csv_filepath = os.path.join(os.path.dirname(__file__), csv_input)
+        with TableReader(csv_filepath, date_parser.date_format) as reader:
+            # Prevents having events that have no title or subtitle
+            rows = [row for row in reader if row[0] and row[2]]
+        titles, date_cells, subtitles, fulldescs, category_cells, media_cells, tag_cells, span_cells = (
+            [row[column] for row in rows] for column in range(8))
+        del rows
+        row_count = len(titles)
+        # Each error as the row, the order its column is checked in by get_events, the column, the message,
+        # and the name of the media file if it can't be found, so they can be listed row by row
+        problems = []
+
+        # Events with a misformatted date are placed at the end of the timeline, with the date as it was written
+        dates, date_codes = EventColumns.factorize(date_cells)
+        parsed_dates = []
+        date_messages = []
+        for date_string in dates:
+            try:
+                parsed_dates.append(date_parser.parse(date_string))
+                date_messages.append(None)
+            except ValueError as error:
+                parsed_dates.append(None)
+                date_messages.append(str(error))
+        dated = np.array([parsed is not None for parsed in parsed_dates], dtype = bool)[date_codes]
+        sort_keys = np.array([date_ordinal(*parsed) if parsed else sys.maxsize for parsed in parsed_dates],
+                             dtype = np.int64)[date_codes]
+        for index, parsed in enumerate(parsed_dates):
+            if parsed is not None:
+                dates[index] = format_date(parsed[0], " BC" if parsed[1] else "")
+        for row in np.flatnonzero(~dated).tolist():
+            problems.append((row, 0, "Start Date", date_messages[date_codes[row]], None))
+
+        # Categories not in the list of valid categories are given 0
+        category_names, category_codes = EventColumns.factorize(category_cells)
+        category_ints = np.zeros(len(category_names), dtype = np.int64)
+        category_messages = {}
+        for index, category_name in enumerate(category_names):
+            try:
+                category_ints[index] = self.category_int(category_name.strip())
+            except KeyError as error:
+                category_messages[index] = re.sub("^ID \\d+: ", "", error.args[0])
+        categories = category_ints[category_codes]
+        for row in np.flatnonzero(np.isin(category_codes, list(category_messages))).tolist():
+            problems.append((row, 1, "Category", category_messages[category_codes[row]], None))
+
+        # The tags before an undefined one are kept, as get_events does
+        tags, tag_codes = EventColumns.factorize(tag_cells)
+        tag_messages = {}
+        for index, tag_cell in enumerate(tags):
+            tag_ints = []
+            for tag in tag_cell.split(self.SEPARATOR):
+                try:
+                    tag_ints.append(str(self.tag_int(tag.strip())))
+                except KeyError as error:
+                    tag_messages[index] = re.sub("^ID \\d+: ", "", error.args[0])
+                    break
+            tags[index] = sys.intern(",".join(tag_ints) + ("," if index in tag_messages and tag_ints else ""))
+        for row in np.flatnonzero(np.isin(tag_codes, list(tag_messages))).tolist():
+            problems.append((row, 2, "Tag(s)", tag_messages[tag_codes[row]], None))
+
+        # Each distinct media cell is made into a Media object that the events copy, -1 for events without media
+        media_cells, media_codes = EventColumns.factorize(media_cells)
+        media = []
+        media_named = np.zeros(len(media_cells), dtype = bool)
+        media_messages = {}
+        for index, media_cell in enumerate(media_cells):
+            media.append(None)
+            if not media_cell: continue
+            media_args = media_cell.split(self.SEPARATOR)
+            # Prevents empty media objects from incrementing media id
+            media_named[index] = bool(media_args[0])
+            # Accounts for the possibility of no thumb position attribute
+            thumb_pos = media_args[2] if len(media_args) == 3 else ""
+            try:
+                media[index] = Media(media_args[0], media_args[1], thumb_pos, check_file = True)
+                self.media_files.add((media[index].media_file, media[index].media_type == "Audio"))
+            except (FileNotFoundError, ValueError, IndexError) as error:
+                media_messages[index] = str(error), media_args[0] if isinstance(error, FileNotFoundError) else None
+        for row in np.flatnonzero(np.isin(media_codes, list(media_messages))).tolist():
+            problems.append((row, 3, "Media") + media_messages[media_codes[row]])
+        media_valid = np.array([media_object is not None for media_object in media], dtype = bool)
+        media_codes = np.where(media_valid[media_codes], media_codes, -1)
+
+        # Spans are few, so each is read in the order of the rows, numbering them as get_events does
+        spans = []
+        for row, span_cell in enumerate(span_cells):
+            if not span_cell: continue
+            current_span = self.read_span(span_cell, span_date_parser, lambda column, message, missing_file=None:
+                                          problems.append((row, 4, column, message, missing_file)))[0]
+            if current_span:
+                spans.append((row, current_span))
+
+        has_errors = np.zeros(row_count, dtype = bool)
+        has_errors[[problem[0] for problem in problems]] = True
+        # With skip-row, the date of a row with errors is free for a later row to use
+        registered = dated & ~has_errors if self.on_error == "skip-row" else dated
+        if self.duplicate_dates == "reject":
+            # Each date belongs to the first row registered with it, and any other row on that date is a duplicate
+            registered_rows = np.flatnonzero(registered)
+            registered_keys, first_rows = np.unique(sort_keys[registered_rows], return_index = True)
+            dated_rows = np.flatnonzero(dated)
+            if len(registered_keys):
+                positions = np.minimum(np.searchsorted(registered_keys, sort_keys[dated_rows]),
+                                       len(registered_keys) - 1)
+                holders = registered_rows[first_rows][positions]
+                duplicated = (registered_keys[positions] == sort_keys[dated_rows]) & (holders < dated_rows)
+                for row, holder in zip(dated_rows[duplicated].tolist(), holders[duplicated].tolist()):
+                    problems.append((row, 0, "Start Date", "Date {} already exists at ID {}".format(
+                            dates[date_codes[row]], holder + 1), None))
+        elif self.duplicate_dates == "offset":
+            # Each duplicate depends on the dates taken before it, so the rows are gone through in order
+            date_registry = set()
+            date_offsets = {}
+            for row in np.flatnonzero(dated).tolist():
+                start_date, is_bc = parsed_dates[date_codes[row]]
+                bc_string = " BC" if is_bc else ""
+                date_key = (bc_string, start_date)
+                if date_key in date_registry:
+                    offset = date_offsets.get(date_key, 0)
+                    shifted_key = date_key
+                    while shifted_key in date_registry:
+                        offset += 1
+                        shifted_key = (bc_string, start_date + timedelta(seconds = offset))
+                    # Rows that are left out don't take up the date they were offset to, as get_events frees it
+                    if registered[row]:
+                        date_offsets[date_key] = offset
+                    date_key = shifted_key
+                    date_codes[row] = len(dates)
+                    dates.append(format_date(shifted_key[1], bc_string))
+                    sort_keys[row] = date_ordinal(shifted_key[1], bc_string)
+                if registered[row]:
+                    date_registry.add(date_key)
+
+        # Errors are listed row by row, in the order get_events finds them
+        problems.sort(key = lambda problem: problem[:2])
+        missing_media = OrderedDict()
+        for index, (row, column_order, column, message, missing_file) in enumerate(problems):
+            self.num_id = row + 1
+            errors.append({"file": csv_input, "id": self.num_id, "column": column, "message": message})
+            print("ID {}: {}".format(self.num_id, message))
+            if missing_file is not None:
+                missing_media.setdefault(missing_file, []).append(self.num_id)
+            if self.on_error == "skip-row" and (index + 1 == len(problems) or problems[index + 1][0] != row):
+                print("ID {}: Leaving out this row because of its errors".format(self.num_id))
+        self.num_id = row_count + 1
+
+        kept = np.ones(row_count, dtype = bool)
+        if self.on_error == "skip-row":
+            kept[[problem[0] for problem in problems]] = False
+        # Only the media and spans of rows that are kept are numbered, as get_events does
+        media_ids = np.cumsum(np.where(media_codes >= 0, media_named[media_codes], False) & kept)
+        self.media_id = int(media_ids[-1]) if row_count else 0
+        spans = [current_span for row, current_span in spans if kept[row]]
+        for span_id, current_span in enumerate(spans, 1):
+            current_span.id = span_id
+        self.span_id = len(spans)
+        events = EventColumns(np.flatnonzero(kept), sort_keys, titles, subtitles, fulldescs, dates, date_codes,
+                              categories, tags, tag_codes, media, media_codes, media_ids, self.text_formatter)
+
+        if not self.finish_reading(csv_input, len(errors) - first_error, missing_media): return
+        return events, spans
+
+    def read_span(self, span_cell, span_date_parser, report_error, span_args=None):
+        """
+        Reads the span of a row, if it has one, numbering it after the spans read before it
+
+        :param string span_cell: The span column of the row
+        :param DateParser span_date_parser: Parses the start and end dates of the span
+        :param function report_error: Called with the column and message of each error, and the name of the
+            image if it can't be found
+        :param list span_args: Optional- The arguments of the span remembered in a manifest, used instead of span_cell
+        :rtype: tuple
+        :return: The span, None if the row has none or it has errors, and its arguments, None if it has none
+        """
+        current_span = None
+        try:
+            if span_args is None:
+                span_attr = span_cell.split(self.SEPARATOR)
+                if len(span_attr) >= 6:
+                    start_date = span_date_parser.parse(span_attr[0], allow_bc = False)[0]
+                    end_date = span_date_parser.parse(span_attr[1], allow_bc = False)[0]
+                    # Allows image/image credit to be left blank
+                    image = "" if len(span_attr) < 7 else span_attr[6]
+                    image_credit = "" if len(span_attr) < 8 else span_attr[7]
+                    span_args = [list(start_date.timetuple()[:6]), list(end_date.timetuple()[:6]),
+                                 span_attr[2], span_attr[3], span_attr[4], span_attr[5], image, image_credit]
+                # Checks if there is 1 - 5 arguments. Prevents an error from being called on a span of 0 args
+                elif span_attr[0] and len(span_attr) > 0:
+                    report_error("Span(s)", "Not enough arguments in the span column - Should be at least 6")
+            if span_args:
+                current_span = Span(self.span_id + 1, datetime(*span_args[0]), datetime(*span_args[1]),
+                                    span_args[2], Color(span_args[3]), span_args[4], Color(span_args[5]),
+                                    span_args[6], span_args[7])
+                # Only numbered once it is made, so spans with errors leave no gaps in the IDs
+                self.span_id += 1
+                self.media_files.add((current_span.bgimage.media_file, False))
+        except (ValueError, FileNotFoundError) as error:
+            report_error("Span(s)", "For this event's span, {}".format(error),
+                         span_args[6] if isinstance(error, FileNotFoundError) else None)
+        return current_span, span_args
+
+    def finish_reading(self, csv_input, error_count, missing_media):
+        """
+        Lists the media files that couldn't be found and how many errors there were once a file is read,
+        and decides whether to continue with the timeline, asking the user if on_error isn't given
+
+        :param string csv_input: The name of the file that was read
+        :param int error_count: The number of errors found in the file
+        :param OrderedDict missing_media: The IDs of the events using each media file that can't be found
+        :rtype: bool
+        :return: Whether to continue with the timeline
+        """
+        # A missing file is usually used by many rows, so each is listed once with the rows using it
+        if missing_media:
+            print("\n{} media files can't be found:".format(len(missing_media)))
+            for media_name, ids in missing_media.items():
+                print('  "{}", used by ID {}'.format(media_name, ", ".join(str(num_id) for num_id in ids)))
+
+        # Checks current error count, and if any errors exist, confirm to continue execution
+        if error_count > 0:
+            print("\nOh no! The script compiled successfully, but you have {} errors to fix!".format(error_count))
+            # Without prompts, on_error decides instead of the user
+            if self.on_error is not None:
+                if self.on_error == "fail": return False
+            else:
+                try:
+                    choice = input("Do you wish to continue? Y/N: ")
+                except EOFError:
+                    # Nobody can answer, such as in a worker process, so don't continue
+                    choice = "N"
+                if choice not in ("Y", "y"): return False
+        if error_count == 0: print("Successfully obtained all event data from {}. No errors.!!".format(csv_input))
+        return True
+
+    def category_int(self, str_name):
+        """
+        :param string str_name: Name of one of the categories from the settings
+        :rtype: int
+        :return: The integer that the category corresponds to
+        :raises KeyError: If the category is not in the list of valid ones
+        """
+        if str_name not in self.categories:
+            raise KeyError('ID {}: Category "{}" is undefined.'.format(self.num_id, str_name))
+        return self.categories[str_name]
+
+    def tag_int(self, str_name):
+        """
+        :param string str_name: Name of one of the tags from the settings
+        :rtype: int
+        :return: The integer that the tag corresponds to, blank if no name is given
+        :raises KeyError: If the tag is not in the list of valid ones
+        """
+        if not str_name: return ""
+        if str_name not in self.tags:
+            raise KeyError('ID {}: Tag "{}" is undefined.'.format(self.num_id, str_name))
+        return self.tags[str_name]
+
+
+class Profiler:
+    """
+    Records how long each stage of a conversion takes, how many times it ran, how many bytes it handled,
+    and how much memory the process had used at most when it last finished
+    Stages are measured by wrapping the functions that do them while the profiler is installed, so nothing is
+    slowed down otherwise. Stages can run inside each other, such as media being encoded while the JSON is written
+
+    :param string cprofile_path: Optional- Where to write cProfile stats of everything run while installed
+    """
+
+    def __init__(self, cprofile_path=None):
+        self.cprofile_path = cprofile_path
+        self.cprofile = None
+        self.stages = OrderedDict()
+        self.originals = []
+        self.seconds = 0.0
+        self.start = None
+
+    @staticmethod
+    def peak_rss():
+        """
+        :rtype: int
+        :return: The most memory the process has used so far in kilobytes, 0 if it can't be measured
+        """
+        if resource is None: return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS counts in bytes rather than kilobytes
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+    def install(self):
+        """
+        Starts measuring the stages
+        """
+        module = sys.modules[__name__]
+        self.wrap(TimelineBuilder, "get_events", "Read csv",
+                  lambda args, result: os.path.getsize(os.path.join(os.path.dirname(__file__), args[1])))
+        self.wrap(DateParser, "parse", "Parse dates", lambda args, result: len(args[1]))
+        self.wrap(TextFormatter, "format", "Format text", lambda args, result: len(args[1]))
+        self.wrap(EventSorter, "add", "Sort events")
+        self.wrap(EventColumns, "__init__", "Sort events")
+        self.wrap(EventColumns, "event", "Build events")
+        self.wrap(MediaCache, "get_data_uri", "Encode media", lambda args, result: len(result))
+        self.wrap(ImageOptimizer, "optimize", "Optimize images", lambda args, result: len(result))
+        self.wrap(MediaCache, "get_url", "Link media")
+        self.wrap(MediaCache, "prepare", "Prepare media")
+        self.wrap(ImportedTimeline, "read", "Import .tki")
+        self.wrap(module, "build_metadata", "Build metadata")
+        self.wrap(module, "iterencode_tki", "Encode JSON", lambda args, chunk: len(chunk))
+        self.wrap(TimelineBuilder, "write_tki", "Write .tki")
+        if self.cprofile_path:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.start = time.perf_counter()
+
+    def uninstall(self):
+        """
+        Stops measuring the stages, and writes the cProfile stats if asked for
+        """
+        self.seconds += time.perf_counter() - self.start
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            self.cprofile = None
+        for owner, attribute, original in reversed(self.originals):
+            setattr(owner, attribute, original)
+        self.originals = []
+
+    def wrap(self, owner, attribute, stage, count_bytes=None):
+        """
+        Replaces a function with one that records its calls as a stage
+        A function returning a generator, such as iterencode_tki, is timed while the generator runs
+
+        :param owner: The class or module the function belongs to
+        :param string attribute: The name of the function
+        :param string stage: The name of the stage in the report
+        :param function count_bytes: Optional- Works out the bytes handled from the arguments and the result,
+            or from each item for a generator
+        """
+        original = getattr(owner, attribute)
+        record = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "bytes": 0, "peak_rss_kb": 0})
+
+        def measure(start, args, result):
+            record["seconds"] += time.perf_counter() - start
+            record["peak_rss_kb"] = self.peak_rss()
+            if count_bytes is not None:
+                record["bytes"] += count_bytes(args, result)
+
+        def timed_generator(generator, args):
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    measure(start, args, "")
+                    return
+                measure(start, args, item)
+                yield item
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            record["calls"] += 1
+            start = time.perf_counter()
+            result = original(*args, **kwargs)
+            if isinstance(result, GeneratorType):
+                return timed_generator(result, args)
+            measure(start, args, result)
+            return result
+
+        self.originals.append((owner, attribute, original))
+        setattr(owner, attribute, timed)
+
+    def to_dict(self, csv_files=()):
+        """
+        Returns the profile as a dictionary, to be kept as JSON for comparing runs over time
+
+        :param list csv_files: The csv files that were converted
+        """
+        return {
+            "time"       : datetime.now().isoformat(timespec = "seconds"),
+            "files"      : list(csv_files),
+            "seconds"    : round(self.seconds, 6),
+            "peak_rss_kb": self.peak_rss(),
+            "stages"     : {stage: dict(record, seconds = round(record["seconds"], 6))
+                            for stage, record in self.stages.items()}
+        }
+
+    def report(self):
+        """
+        Returns the profile as a table, with one line per stage
+        """
+        lines = ["", "{:<16}{:>10}{:>12}{:>16}{:>16}".format("Stage", "Calls", "Seconds", "Bytes", "Peak RSS (MB)")]
+        for stage, record in self.stages.items():
+            lines.append("{:<16}{:>10}{:>12.3f}{:>16}{:>16.1f}".format(stage, record["calls"], record["seconds"],
+                                                                      record["bytes"], record["peak_rss_kb"] / 1024))
+        lines.append("{:<16}{:>10}{:>12.3f}{:>16}{:>16.1f}".format("Total", "", self.seconds, "",
+                                                                  self.peak_rss() / 1024))
+        return "\n".join(lines)
+
+
+class DateParser:
+    """
+    Parses dates written in a strptime format, along with BC dates such as 05/18/2012 BC
+    Formats made up of %m, %d, %Y, %H, %M, and %S are matched with a precompiled regex, and anything else,
+    including dates the regex doesn't match, falls back to datetime.strptime
+    Dates that have already been parsed are remembered, since the same date often appears many times
+
+    :param string date_format: The strptime format of the dates
+    :param int max_entries: How many parsed dates are remembered
+    """
+
+    # One parser is kept for each format, so what it remembers is shared by every file
+    PARSERS = {}
+    # Removes " BC" or any form with lower case letters/periods
+    BC_PATTERN = re.compile(r' [b|B]\.?[c|C]\.?')
+    # Matches the same values as strptime does for each directive
+    DIRECTIVES = {
+        "%m": r"(?P<month>1[0-2]|0[1-9]|[1-9])",
+        "%d": r"(?P<day>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])",
+        "%Y": r"(?P<year>\d\d\d\d)",
+        "%H": r"(?P<hour>2[0-3]|[0-1]\d|\d)",
+        "%M": r"(?P<minute>[0-5]\d|\d)",
+        "%S": r"(?P<second>[0-5]\d|\d)",
+        "%%": "%"
+    }
+
+    def __init__(self, date_format=DATE_FORMAT, max_entries=65536):
+        self.date_format = date_format
+        self.max_entries = max_entries
+        self.parsed = {}
+        self.pattern = self.compile_format(date_format)
+
+    @classmethod
+    def for_format(cls, date_format):
+        """
+        Gets the shared parser for a format, creating it the first time the format is used
+
+        :param string date_format: The strptime format of the dates
+        :rtype: DateParser
+        """
+        if date_format not in cls.PARSERS:
+            cls.PARSERS[date_format] = cls(date_format)
+        return cls.PARSERS[date_format]
+
+    @classmethod
+    def compile_format(cls, date_format):
+        """
+        Turns a strptime format into a regex that matches the same dates
+
+        :param string date_format: The strptime format of the dates
+        :rtype: re.Pattern
+        :return: The compiled regex, None if the format has a directive without a fast path
+        """
+        regex = ""
+        for part in re.split("(%.)", date_format):
+            if part in cls.DIRECTIVES:
+                # Each directive can only be matched once in a regex
+                if cls.DIRECTIVES[part] in regex and part != "%%": return None
+                regex += cls.DIRECTIVES[part]
+            elif part.startswith("%"):
+                return None
+            else:
+                # strptime lets any amount of whitespace match whitespace in the format
+                regex += r"\s+".join(re.escape(word) for word in re.split(r"\s+", part))
+        return re.compile(regex, re.IGNORECASE)
+
+    def parse(self, date_string, allow_bc=True):
+        """
+        Parses a date, which can be followed by BC if allowed
+
+        :param string date_string: The date as it is written in the csv file
+        :param bool allow_bc: Whether the date can be BC. If not, a BC date doesn't match the format
+        :rtype: tuple
+        :return: The date as a datetime, with the year counted back from 1 AD if it is BC, and whether it is BC
+        :raises ValueError: If the date doesn't match the format
+        """
+        key = (date_string, allow_bc)
+        if key in self.parsed:
+            return self.parsed[key]
+
+        is_bc = allow_bc and (" bc" in date_string.lower() or " b.c." in date_string.lower())
+        stripped = DateParser.BC_PATTERN.sub("", date_string) if allow_bc else date_string
+        date = None
+        match = self.pattern.fullmatch(stripped) if self.pattern else None
+        if match:
+            fields = match.groupdict()
+            try:
+                date = datetime(int(fields.get("year") or 1900), int(fields.get("month") or 1),
+                                int(fields.get("day") or 1), int(fields.get("hour") or 0),
+                                int(fields.get("minute") or 0), int(fields.get("second") or 0))
+            except ValueError:
+                # Lets strptime raise its usual error, such as for February 30th
+                pass
+        if date is None:
+            date = datetime.strptime(stripped, self.date_format)
+
+        # Starts over rather than growing without bound on timelines with many different dates
+        if len(self.parsed) >= self.max_entries:
+            self.parsed.clear()
+        self.parsed[key] = date, is_bc
+        return date, is_bc
+
+
+def format_date(date, bc_string=""):
+    """
+    Puts a date in the format that the timeline software desires, such as 2012-05-18 00:00:00
+    BC dates have the form 2012 BC-05-18 00:00:00
+
+    :param datetime date: The date to format
+    :param string bc_string: " BC" if the date is BC, blank otherwise
+    :rtype: string
+    :return: The formatted date
+    """
+    # The year is padded by hand, since strftime doesn't pad years before 1000 on every platform
+    return "{:04d}{}-{}".format(date.year, bc_string, date.strftime("%m-%d %H:%M:%S"))
+
+
+def parse_tki_date(date_string):
+    """
+    Reads a date back from the format that the timeline software desires, see format_date
+
+    :param string date_string: The formatted date, such as 2012-05-18 00:00:00 or 2012 BC-05-18 00:00:00
+    :rtype: tuple
+    :return: The date as a datetime, and " BC" if the date is BC, blank otherwise
+    :raises ValueError: If the date isn't in that format
+    """
+    match = re.match("^(\\d+)( BC)?-(\\d+-\\d+ \\d+:\\d+:\\d+)$", date_string.strip())
+    if match is None:
+        raise ValueError('"{}" is not a date of a .tki file'.format(date_string))
+    date = datetime.strptime(match.group(3), "%m-%d %H:%M:%S")
+    return date.replace(year = int(match.group(1))), match.group(2) or ""
+
+
+def date_ordinal(date, bc=False):
+    """
+    Turns a date into a single integer that sorts chronologically across BC and AD
+    Uses the astronomical year, where 1 BC is year 0 and 2 BC is year -1, followed by the day of the year and time
+
+    :param datetime date: The date, with the year counted back from 1 AD if it is BC
+    :param bool bc: Whether the date is BC
+    :rtype: int
+    :return: The number of seconds from the start of year 0 to the date, negative before then
+    """
+    year = 1 - date.year if bc else date.year
+    day = date.timetuple().tm_yday - 1
+    return ((year * 366 + day) * 24 + date.hour) * 3600 + date.minute * 60 + date.second
+
+
+def format_text_block(replace_str, modifiers=None):
+    r"""
+    Modifiers are defined to convert into a format that the software can understand
+        - ``&tab;`` 4 n-sized spaces, essentially a tab with format &nbsp;&nbsp;&nbsp;&nbsp;
+        - ``\n`` A new line character, but the software defines it as ;xNLx;
+    Escapes special chars that might break the timeline software by calling json.dumps().
+    Allows for further expansion through the Modifiers section of the settings file
+
+    :param string replace_str: The string that we want to replace the matches in
+    :param dict modifiers: Optional- Shorthand text and what it is replaced by, on top of the default ones
+    :rtype: string
+    :return: A string with the user defined values replaced by the timeline specific ones
+    .. seealso:: TextFormatter
+    """
+    return TextFormatter.for_modifiers(modifiers).format(replace_str)
+
+
+class TextFormatter:
+    """
+    Replaces all of the shorthand text in a string in one pass
+    The modifiers are compiled into a single regular expression once, so the cost of a string doesn't grow with
+    the number of modifiers. Where modifiers overlap, the longest one is replaced, and replacements are never
+    themselves replaced again
+
+    :param dict modifiers: Optional- Shorthand text and what it is replaced by, on top of DEFAULT_MODIFIERS
+    """
+
+    # Add shorthand text you would use often in the Title, Subtitle, or Description attributes,
+    # or add it to the Modifiers section of the settings file
+    DEFAULT_MODIFIERS = OrderedDict([
+        ("&tab;", "&nbsp;&nbsp;&nbsp;&nbsp;"),
+        ("\n"   , ";xNLx;")
+    ])
+    # The formatter for each set of modifiers, so each is only compiled once
+    FORMATTERS = {}
+
+    def __init__(self, modifiers=None):
+        self.modifiers = OrderedDict(TextFormatter.DEFAULT_MODIFIERS)
+        self.modifiers.update(modifiers or {})
+        # Longer modifiers are tried first, so one that starts with another still gets replaced whole
+        keys = sorted(self.modifiers, key = len, reverse = True)
+        self.pattern = re.compile("(" + "|".join(re.escape(key) for key in keys) + ")")
+        # Most text has no shorthand at all, which is quicker to rule out by looking for these than with the regex
+        self.first_chars = sorted({key[0] for key in keys})
+
+    @classmethod
+    def for_modifiers(cls, modifiers=None):
+        """
+        :param dict modifiers: Optional- Shorthand text and what it is replaced by, on top of DEFAULT_MODIFIERS
+        :rtype: TextFormatter
+        :return: The formatter for the modifiers, compiled the first time they are used
+        """
+        key = tuple(modifiers.items()) if modifiers else ()
+        if key not in cls.FORMATTERS:
+            cls.FORMATTERS[key] = cls(modifiers)
+        return cls.FORMATTERS[key]
+
+    def format(self, replace_str):
+        """
+        :param string replace_str: The string that we want to replace the matches in
+        :rtype: string
+        :return: A string with the user defined values replaced by the timeline specific ones
+        """
+        if not any(char in replace_str for char in self.first_chars): return replace_str
+        parts = self.pattern.split(replace_str)
+        # Every other part is a modifier that was matched
+        parts[1::2] = [self.modifiers[key] for key in parts[1::2]]
+        return "".join(parts)
+
+
+class TableReader:
+    """
+    Reads the rows of a timeline from a csv, tsv, JSON Lines, or Excel file, chosen by its extension
+    Columns are matched to those get_events reads by the names in the header, such as "Start Date" or "Tags",
+    so they can be in any order, and missing ones are left blank. A header that doesn't name the title, date, and
+    subtitle columns is skipped, and the columns are taken in the order of COLUMNS, as they always were. So is one
+    with columns of other names, as long as the columns it does name are in that order.
+    Every row is given as a list of strings in the order of COLUMNS, with the header left out
+
+    :param string path: The path of the file
+    :param string date_format: The strptime format dates in Excel cells are written in, since they aren't text
+    """
+    # The columns of a timeline, in the order get_events reads them
+    COLUMNS = ("Title", "Start Date", "Subtitle", "Full Description", "Category", "Media", "Tag(s)", "Span(s)")
+    # The names each column can have in a header, in lower case without spaces or punctuation
+    NAMES = {
+        "title"          : 0, "eventtitle": 0,
+        "startdate"      : 1, "date": 1,
+        "subtitle"       : 2, "introtext": 2,
+        "fulldescription": 3, "description": 3,
+        "category"       : 4,
+        "media"          : 5, "image": 5,
+        "tag"            : 6, "tags": 6,
+        "span"           : 7, "spans": 7
+    }
+    # The format of each file extension, csv for any other extension
+    FORMATS = {".tsv": "tsv", ".tab": "tsv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".xlsx": "xlsx", ".xlsm": "xlsx"}
+
+    def __init__(self, path, date_format=DATE_FORMAT):
+        self.path = path
+        self.date_format = date_format
+        self.file = None
+        self.workbook = None
+
+    @classmethod
+    def format_of(cls, path):
+        """
+        :param string path: The path of the file
+        :rtype: string
+        :return: The format the file is read as, "csv", "tsv", "jsonl", or "xlsx"
+        """
+        return cls.FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+
+    @classmethod
+    def column_of(cls, name):
+        """
+        :param string name: The name of a column in a header
+        :rtype: int
+        :return: The index in COLUMNS of the column, None if the name isn't one of its names
+        """
+        return cls.NAMES.get(re.sub("[^a-z]", "", name.lower().replace("(s)", "")))
+
+    @classmethod
+    def column_map(cls, header):
+        """
+        Matches the names in a header to the columns
+
+        :param list header: The names in the header
+        :rtype: list
+        :return: The position in the row of each of COLUMNS, None for columns the header doesn't have
+        """
+        positions = {}
+        unknown = []
+        for position, name in enumerate(header):
+            column = cls.column_of(name)
+            if column is not None:
+                positions.setdefault(column, position)
+            elif name.strip():
+                unknown.append(name)
+        # Headers that don't name the columns keep the order they always had
+        if not all(column in positions for column in (0, 1, 2)):
+            return list(range(len(cls.COLUMNS)))
+        if unknown:
+            # So do headers with names of their own, such as "Notes" or "Picture", when the columns they do name
+            # are where that order has them
+            if all(position == column for column, position in positions.items()):
+                return list(range(len(cls.COLUMNS)))
+            print("Leaving out the columns {}, which aren't columns of a timeline".format(
+                    ", ".join('"{}"'.format(name) for name in unknown)))
+            missing = [name for column, name in enumerate(cls.COLUMNS) if column not in positions]
+            if missing:
+                print("Leaving blank the columns {}, which the header doesn't have".format(
+                        ", ".join('"{}"'.format(name) for name in missing)))
+        return [positions.get(column) for column in range(len(cls.COLUMNS))]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            self.file.close()
+        if self.workbook is not None:
+            self.workbook.close()
+
+    def __iter__(self):
+        rows = getattr(self, "read_" + self.format_of(self.path))()
+        header = next(rows, None)
+        if header is None: return
+        column_map = self.column_map(header)
+        in_order = column_map == list(range(len(self.COLUMNS)))
+        for row in rows:
+            # Rows already in order are given as they are, so their cells stay the same for a Manifest
+            if in_order and len(row) >= len(column_map):
+                yield row
+            else:
+                yield [row[position] if position is not None and position < len(row) else ""
+                       for position in column_map]
+
+    def read_csv(self, delimiter=","):
+        """
+        :param string delimiter: Optional- The character between cells
+        :rtype: iterator
+        :return: The header, then the cells of each row
+        """
+        self.file = open(self.path, encoding = "utf-8")
+        return csv.reader(self.file, delimiter = delimiter)
+
+    def read_tsv(self):
+        """
+        :rtype: iterator
+        :return: The header, then the cells of each row
+        """
+        return self.read_csv("\t")
+
+    def read_jsonl(self):
+        """
+        Each line is an object, whose keys are matched to the columns the same way as a header
+        Lists, such as of several tags, are joined with TimelineBuilder.SEPARATOR
+
+        :rtype: generator
+        :return: The header, then the cells of each row
+        :raises ValueError: If a line isn't a JSON object
+        """
+        self.file = open(self.path, encoding = "utf-8")
+        yield list(self.COLUMNS)
+        for line_number, line in enumerate(self.file, 1):
+            if not line.strip(): continue
+            try:
+                values = json.loads(line)
+            except ValueError as error:
+                raise ValueError("Line {} of {} isn't valid JSON: {}".format(line_number, self.path, error))
+            if not isinstance(values, dict):
+                raise ValueError("Line {} of {} isn't a JSON object".format(line_number, self.path))
+            row = [""] * len(self.COLUMNS)
+            for key, value in values.items():
+                column = self.column_of(key)
+                if column is not None:
+                    row[column] = self.cell_text(value)
+            yield row
+
+    def read_xlsx(self):
+        """
+        Streams the rows of the first worksheet, the one Sort_and_Export.bas exports
+        Formulas are read as the values Excel last worked out for them
+
+        :rtype: generator
+        :return: The header, then the cells of each row
+        :raises ValueError: If the file isn't an Excel workbook, or openpyxl isn't installed
+        """
+        if load_workbook is None:
+            raise ValueError("Reading {} needs openpyxl, which can be installed with: pip install openpyxl"
+                             .format(self.path))
+        try:
+            self.workbook = load_workbook(self.path, read_only = True, data_only = True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError) as error:
+            raise ValueError("{} isn't an Excel workbook: {}".format(self.path, error))
+        for row in self.workbook.worksheets[0].iter_rows(values_only = True):
+            yield [self.cell_text(value) for value in row]
+
+    def cell_text(self, value):
+        """
+        Turns a value from a JSON Lines or Excel file into the text a csv file would have
+
+        :param value: The value of the cell
+        :rtype: string
+        """
+        if value is None: return ""
+        if isinstance(value, str): return value
+        if isinstance(value, datetime): return value.strftime(self.date_format)
+        # Excel keeps whole numbers as floats
+        if isinstance(value, float) and value.is_integer(): return str(int(value))
+        if isinstance(value, list): return TimelineBuilder.SEPARATOR.join(self.cell_text(item) for item in value)
+        return str(value)
+
+
+class Manifest:
+    """
+    Remembers what each row of a csv file was turned into, along with the state of the media files it uses,
+    so a row that hasn't changed can be reused on the next run instead of being processed again
+    A row is only reused if its cells and media files are unchanged, and no rows are reused if the context,
+    such as the categories, tags, or date formats, changed
+
+    :param string path: Where the manifest is stored
+    :param string context: Everything besides the row itself that decides what a row is turned into
+    """
+
+    # Increased whenever the way rows are stored changes, so older manifests are ignored
+    VERSION = 1
+
+    def __init__(self, path, context):
+        self.path = path
+        self.context = context
+        # The rows from the last run, and the rows seen in this run
+        self.previous_rows = {}
+        self.rows = {}
+        self.file_states = {}
+        self.reused = 0
+        try:
+            with open(path, encoding = "utf-8") as manifest_file:
+                stored = json.load(manifest_file)
+            if stored.get("version") == Manifest.VERSION and stored.get("context") == context:
+                self.previous_rows = stored["rows"]
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @staticmethod
+    def row_key(row):
+        """
+        :param list row: The cells of a row in the csv file
+        :rtype: string
+        :return: The hash identifying the contents of the row
+        """
+        return hashlib.sha1(json.dumps(row).encode()).hexdigest()
+
+    def file_state(self, path):
+        """
+        :param string path: The path of a media file
+        :rtype: list
+        :return: The modification time and size of the file, None if it doesn't exist
+        """
+        if path not in self.file_states:
+            try:
+                stat = os.stat(path)
+                self.file_states[path] = [stat.st_mtime_ns, stat.st_size]
+            except FileNotFoundError:
+                self.file_states[path] = None
+        return self.file_states[path]
+
+    def get(self, row_key):
+        """
+        Gets a row as it was processed in the last run
+
+        :param string row_key: The hash of the row, from row_key
+        :rtype: dict
+        :return: The processed row, None if the row or one of its media files changed
+        """
+        entry = self.previous_rows.get(row_key)
+        if entry is None or any(self.file_state(path) != state for path, state in entry["files"].items()):
+            return None
+        self.reused += 1
+        return entry["row"]
+
+    def put(self, row_key, processed_row, files):
+        """
+        Remembers a processed row for the next run
+
+        :param string row_key: The hash of the row, from row_key
+        :param dict processed_row: The values the row was turned into
+        :param list files: The paths of the media files the row uses
+        """
+        self.rows[row_key] = {"row": processed_row, "files": {path: self.file_state(path) for path in files}}
+
+    def save(self):
+        """
+        Writes the rows seen in this run to the manifest, dropping any that are no longer in the csv file
+        """
+        stored = {"version": Manifest.VERSION, "context": self.context, "rows": self.rows}
+        # Writes to a temporary file first, so an interrupted run never leaves a partial manifest
+        # Each run writes to its own temporary file, so runs saving the same manifest at once don't mix them up
+        file_descriptor, temporary_path = tempfile.mkstemp(".tmp", dir = os.path.dirname(self.path) or ".")
+        with os.fdopen(file_descriptor, "w", encoding = "utf-8") as manifest_file:
+            json.dump(stored, manifest_file)
+        os.replace(temporary_path, self.path)
+
+
+class TkiReader:
+    """
+    Reads a .tki file one value at a time, so a timeline far larger than memory can be read
+    The fields of the timeline are read in order, and lists, such as the stories, one item at a time.
+    Only as much of the file as the value being read is held in memory
+
+    :param tki_file: The open text file to read
+    """
+    # How much of the file is read at a time, at least
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, tki_file):
+        self.tki_file = tki_file
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+
+    def fill(self):
+        """
+        Reads more of the file, dropping what has already been read
+
+        :rtype: bool
+        :return: False at the end of the file
+        """
+        # Reads at least as much as is left unread, so a long value is read in a few large steps
+        chunk = self.tki_file.read(max(TkiReader.CHUNK_SIZE, len(self.buffer) - self.position))
+        if not chunk: return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """
+        :rtype: string
+        :return: The next character that isn't white space, without reading past it, blank at the end of the file
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, characters):
+        """
+        :param string characters: The characters that can come next
+        :rtype: string
+        :return: The next character that isn't white space, which is read past
+        :raises ValueError: If the next character isn't one of the characters
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError("Expected one of {} but found {}".format(
+                    characters, repr(character) if character else "the end"))
+        self.position += 1
+        return character
+
+    def value(self):
+        """
+        :return: The next JSON value in the file
+        :raises ValueError: If the next value isn't valid JSON
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                # The value may continue past what has been read so far
+                if self.fill(): continue
+                raise
+            # A number can also continue past what has been read
+            if end == len(self.buffer) and self.fill(): continue
+            self.position = end
+            return value
+
+    def fields(self):
+        """
+        Reads the fields of the timeline, skipping the var TLTimelineData = in front of them
+        A list is given as a generator of its items, which must be read before the next field
+
+        :rtype: generator
+        :return: The name and value of each field
+        :raises ValueError: If the file isn't a .tki file
+        """
+        if self.peek() == "v":
+            while self.peek() and self.buffer[self.position] != "=":
+                self.position += 1
+            self.expect("=")
+        self.expect("{")
+        if self.peek() == "}": return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key, self.items() if self.peek() == "[" else self.value()
+            if self.expect(",}") == "}": return
+
+    def items(self):
+        """
+        :rtype: generator
+        :return: Each item of the list that comes next
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]": return
+
+
+class ImportedTimeline:
+    """
+    A timeline read back from a .tki file, so that events can be added to it without building it again
+    The stories are read one at a time and sorted like those of a csv file, so a timeline far larger than memory
+    can be imported. Media is kept as it is in the file, so nothing is encoded again, and the settings of the
+    timeline, such as its title and colors, are written back as they were
+
+    :param string tki_path: The path of the .tki file
+    :raises ValueError: If the file isn't a .tki file
+    :raises FileNotFoundError: If the file doesn't exist
+    """
+
+    def __init__(self, tki_path):
+        self.tki_path = tki_path
+        # Every field of the timeline besides its categories, tags, spans, and stories
+        self.header = {}
+        self.categories = []
+        self.tags = []
+        self.spans = []
+        self.events = EventSorter()
+        # Maps the date of each story, as get_events keys it, to where it is, for checking for duplicate dates
+        self.dates = {}
+        # The highest IDs in the file, so added media and spans get new ones
+        self.media_id = 0
+        self.span_id = 0
+        # Compact output is written as UTF-8, so it is read as UTF-8 whatever the locale
+        with open(tki_path, encoding = "utf-8") as tki_file:
+            try:
+                self.read(TkiReader(tki_file))
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                raise ValueError('"{}" can\'t be read as a .tki file: {}'.format(tki_path, error))
+
+    def read(self, reader):
+        """
+        :param TkiReader reader: The reader of the .tki file
+        """
+        for key, value in reader.fields():
+            if key == "stories":
+                for story in value:
+                    event = Event.from_dict(story)
+                    # The media is most of what a story holds, so the events are sorted in runs by their size
+                    media = story.get("media") or []
+                    self.events.add(event, sum(len(media_data.get("mediaDataUri", "")) for media_data in media))
+                    self.media_id = max([self.media_id] + [media_data.get("id", 0) for media_data in media])
+                    # A story with a misformatted date doesn't take up a date, like a row with one in get_events
+                    if event.sort_key == sys.maxsize: continue
+                    start_date, bc_string = parse_tki_date(event.start_date)
+                    self.dates.setdefault((bc_string, start_date), '{} of "{}"'.format(
+                            event.id, os.path.basename(self.tki_path)))
+            elif key == "categories":
+                self.categories = [Category.from_dict(cat_data) for cat_data in value]
+            elif key == "tags":
+                self.tags = [Tag.from_dict(tag_data) for tag_data in value]
+            elif key == "spans":
+                self.spans = [Span.from_dict(span_data) for span_data in value]
+                self.span_id = max([0] + [span.id for span in self.spans])
+            else:
+                self.header[key] = list(value) if isinstance(value, GeneratorType) else value
+
+    def add_settings(self, timeline_settings):
+        """
+        Adds the categories and tags of the settings that the timeline doesn't have yet, numbered after its own,
+        so both its stories and new events can refer to them
+
+        :param tuple timeline_settings: The settings, as returned by settings()
+        """
+        names = {category.str_name for category in self.categories}
+        category_int = max([0] + [category.category_int for category in self.categories])
+        for category in timeline_settings[0]:
+            if category.str_name not in names:
+                category_int += 1
+                self.categories.append(Category(category.str_name, str(category.color), category_int))
+        names = {tag.str_name for tag in self.tags}
+        tag_int = max([0] + [tag.tag_int for tag in self.tags if tag.tag_int != ""])
+        for tag in timeline_settings[1]:
+            if tag.str_name not in names:
+                tag_int += 1
+                self.tags.append(Tag(tag.str_name, tag_int))
+
+
+class EventSorter:
+    """
+    Sorts events by date without holding all of them in memory
+    Events are kept in memory until run_size of them have been added, then sorted and written to a temporary
+    file as a run. Reading the events merges the runs back together, one event from each run at a time.
+    Events on the same date stay in the order they were added, and the events can only be read once
+
+    :param int run_size: How many events are kept in memory before being written to a run
+    :param int run_bytes: How many bytes the events in memory can hold before being written to a run, for events
+        that hold their media, such as those of an ImportedTimeline
+    """
+    RUN_SIZE = 10000
+    RUN_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, run_size=RUN_SIZE, run_bytes=RUN_BYTES):
+        self.run_size = run_size
+        self.run_bytes = run_bytes
+        self.run = []
+        self.size = 0
+        self.run_files = []
+        self.count = 0
+        # The first and last events once sorted, so the dates of the timeline are known before it is read
+        self.first = None
+        self.last = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """
+        Only the first and last events can be looked up, since the others may not be in memory
+        """
+        if not self.count or index not in (0, -1):
+            raise IndexError("Only the first and last of the sorted events can be looked up")
+        return self.first if index == 0 else self.last
+
+    def __iter__(self):
+        runs = [self.read_run(run_file) for run_file in self.run_files]
+        runs.append(sorted(self.run, key = lambda ev: ev.sort_key))
+        return heapq.merge(*runs, key = lambda ev: ev.sort_key)
+
+    def add(self, event, size=0):
+        """
+        :param Event event: The event to sort, with its sort_key set
+        :param int size: Optional- Roughly how many bytes the event holds, for events that hold their media
+        """
+        self.count += 1
+        if self.first is None or event.sort_key < self.first.sort_key:
+            self.first = event
+        if self.last is None or event.sort_key >= self.last.sort_key:
+            self.last = event
+        self.run.append(event)
+        self.size += size
+        if len(self.run) >= self.run_size or self.size >= self.run_bytes:
+            run_file = tempfile.TemporaryFile()
+            for run_event in sorted(self.run, key = lambda ev: ev.sort_key):
+                pickle.dump(run_event, run_file, pickle.HIGHEST_PROTOCOL)
+            self.run_files.append(run_file)
+            self.run = []
+            self.size = 0
+
+    @staticmethod
+    def read_run(run_file):
+        """
+        Reads the events of a run back in order, closing and so deleting the run once done
+
+        :param run_file: The temporary file the run was written to
+        :rtype: generator
+        """
+        with run_file:
+            run_file.seek(0)
+            while True:
+                try:
+                    yield pickle.load(run_file)
+                except EOFError:
+                    return
+
+
+class EventColumns:
+    """
+    Holds the events read by TimelineBuilder.get_event_columns as columns, with one entry per row of the csv file
+    The rows are sorted by date with a stable argsort, so events on the same date stay in the order they were read.
+    Each Event is only built, with its text formatted and its media copied, when it is read, and unlike with
+    EventSorter, the events can be read any number of times and looked up by position
+
+    :param array rows: The rows that are events, rows with errors can be left out
+    :param array sort_keys: The ordinal of the start date of each row, see date_ordinal
+    :param list titles: The title of each row, as written in the csv file
+    :param list subtitles: The subtitle of each row, as written in the csv file
+    :param list fulldescs: The full description of each row, as written in the csv file
+    :param list dates: The distinct start dates, in the format of the timeline software
+    :param array date_codes: The index of the start date of each row in dates
+    :param array categories: The category integer of each row
+    :param list tags: The distinct tags strings
+    :param array tag_codes: The index of the tags string of each row in tags
+    :param list media: The distinct media, which are copied for each event using them
+    :param array media_codes: The index of the media of each row in media, -1 for rows without media
+    :param array media_ids: The media ID of each row
+    :param TextFormatter text_formatter: Formats the title, subtitle, and full description of each event
+    """
+
+    def __init__(self, rows, sort_keys, titles, subtitles, fulldescs, dates, date_codes, categories, tags, tag_codes,
+                 media, media_codes, media_ids, text_formatter):
+        self.order = rows[np.argsort(sort_keys[rows], kind = "stable")]
+        self.sort_keys = sort_keys
+        self.titles = titles
+        self.subtitles = subtitles
+        self.fulldescs = fulldescs
+        self.dates = dates
+        self.date_codes = date_codes
+        self.categories = categories
+        self.tags = tags
+        self.tag_codes = tag_codes
+        self.media = media
+        self.media_codes = media_codes
+        self.media_ids = media_ids
+        self.text_formatter = text_formatter
+
+    @staticmethod
+    def factorize(values):
+        """
+        Finds the distinct values of a column, and which of them each row has
+        A dict is used rather than numpy.unique, since fixed width strings would take up as much memory for every
+        row as the longest cell does
+
+        :param list values: The cells of the column
+        :rtype: tuple
+        :return: The list of distinct values, in the order they first appear, and the array of the index of each cell
+        """
+        distinct = {}
+        codes = np.fromiter((distinct.setdefault(value, len(distinct)) for value in values), dtype = np.intp,
+                            count = len(values))
+        return list(distinct), codes
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        return self.event(int(self.order[index]))
+
+    def __iter__(self):
+        for row in self.order.tolist():
+            yield self.event(row)
+
+    def event(self, row):
+        """
+        Builds the event of a row
+
+        :param int row: The row of the csv file, not counting rows without a title or subtitle
+        :rtype: Event
+        """
+        media = ""
+        media_code = self.media_codes[row]
+        if media_code >= 0:
+            media = copy.copy(self.media[media_code])
+            media.media_id = int(self.media_ids[row])
+        start_date = self.dates[self.date_codes[row]]
+        format_text = self.text_formatter.format
+        return Event(row + 1, format_text(self.titles[row]), start_date, start_date, format_text(self.subtitles[row]),
+                     format_text(self.fulldescs[row]), int(self.categories[row]), media,
+                     self.tags[self.tag_codes[row]], int(self.sort_keys[row]))
+
+
+class Event:
+    """
+    Holds event data for one single event
+
+    :param int event_id: The identifier for the event. Only one event per number
+    :param string title: The main name of the event
+    :param string start_date: When the event started
+    :param string end_date: When the event ended
+    :param string subtitle: A little more insight into the event
+    :param string fulldesc: The entire description of what happened during the event
+    :param int category: Which category the event belongs to
+    :param Media media: Optional- An image to go with the event
+    :param int tag: Optional- Which tags are associated with the image
+    :param int sort_key: Optional- Ordinal of the start date that the events are sorted by, see date_ordinal
+    """
+    # Without a __dict__, each event takes up much less memory, which adds up over large timelines
+    __slots__ = ("id", "title", "start_date", "end_date", "subtitle", "fulldesc", "category", "media", "tag",
+                 "sort_key", "extra")
+
+    def __init__(self, event_id, title, start_date, end_date, subtitle, fulldesc, category, media, tag, sort_key=0):
+        self.id = event_id
+        self.title = title
+        self.start_date = start_date
+        self.end_date = end_date
+        self.subtitle = subtitle
+        self.fulldesc = fulldesc
+        self.category = category
+        self.media = media
+        self.tag = tag
+        self.sort_key = sort_key
+        # Fields of an imported story that this event doesn't otherwise write, see from_dict
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, story):
+        """
+        Reads an event back from a story of a .tki file, keeping its media as it is
+        Anything in the story that to_dict wouldn't write the same, such as a link, is kept to be written as it was
+
+        :param dict story: The story, as written by to_dict
+        :rtype: Event
+        :return: The event, with its sort_key worked out from its start date, sys.maxsize if the date isn't in the
+            format of a .tki file
+        :raises KeyError: If the story has no start date
+        """
+        # Stories written with a misformatted date, such as with on_error "continue", stay at the end of the timeline
+        try:
+            start_date, bc_string = parse_tki_date(story["startDate"])
+            sort_key = date_ordinal(start_date, bc_string)
+        except ValueError:
+            sort_key = sys.maxsize
+        media = story.get("media") or []
+        event = cls(story.get("id", 0), story.get("title", ""), story["startDate"],
+                    story.get("endDate", story["startDate"]), story.get("text", ""), story.get("fullText", ""),
+                    story.get("category", 0), Media.from_dict(media[0]) if media else "", story.get("tags", ""),
+                    sort_key)
+        written = event.to_dict()
+        event.extra = {key: value for key, value in story.items() if key != "id" and written.get(key) != value}
+        return event
+
+    def __str__(self):
+        """
+        Returns event as a string that is friendly with Tiki-Toki software
+        """
+        return json.dumps(self.to_dict())
+
+    def to_dict(self, media_cache=None):
+        """
+        Returns event as a dictionary that is friendly with Tiki-Toki software
+
+        :param MediaCache media_cache: Optional- The cache the media is written with, Media.CACHE if not given
+        """
+        event_data = {
+            "id"          : self.id,
+            "title"       : self.title,
+            "startDate"   : self.start_date,
+            "endDate"     : self.end_date,
+            "text"        : self.subtitle,
+            "fullText"    : self.fulldesc,
+            "category"    : self.category,
+            "tags"        : str(self.tag),
+            "dateFormat"  : "auto",
+            "externalLink": "",
+            "media"       : [],
+            "ownerId"     : "100",
+            "ownerName"   : ""
+        }
+        if self.media: event_data["media"].append(self.media.to_dict(media_cache))
+        if self.extra: event_data.update(self.extra)
+        return event_data
+
+
+class Category:
+    """
+    A category consists of a user-defined name and color
+    The valid categories are defined in the settings, and events refer to them by name
+
+    :param string str_name: Name of the category
+    :param string color: What color is associated with the category
+    :param int category_int: The integer that the category corresponds to (used in event data)
+    """
+    __slots__ = ("str_name", "category_int", "color")
+
+    def __init__(self, str_name, color="#FFFFFF", category_int=1):
+        self.str_name = str_name
+        self.category_int = category_int
+        try:
+            self.color = Color(color)
+        except ValueError:
+            raise ValueError('For category "{}", the color code "{}" is invalid.'.format(self.str_name, color))
+
+    @classmethod
+    def from_dict(cls, cat_data):
+        """
+        Reads a category back from a .tki file
+
+        :param dict cat_data: The category, as written by to_dict
+        :rtype: Category
+        """
+        return cls(cat_data["title"], cat_data["colour"], cat_data["id"])
+
+    def __str__(self):
+        """
+        Returns the full category description, to be used in the opening metadata
+        """
+        return json.dumps(self.to_dict())
+
+    def to_dict(self):
+        """
+        Returns the full category description as a dictionary
+        """
+        cat_data = {
+            "id"    : self.category_int,
+            "title" : self.str_name,
+            "colour": str(self.color),
+            "layout": "0",
+            "rows"  : "3",
+            "order" : "10",
+            "size"  : "10"
+        }
+        return cat_data
+
+
+class Tag:
+    """
+    A tag consists of a user-defined name
+    The valid tags are defined in the settings, and events refer to them by name
+
+    :param string str_name: Name of the tag
+    :param int tag_int: The integer that the tag corresponds to (used in event data), blank if there is no name
+    """
+    __slots__ = ("str_name", "tag_int")
+
+    def __init__(self, str_name="", tag_int=1):
+        self.str_name = str_name
+        # Blank to prevent error if no Tag is present for that event
+        self.tag_int = tag_int if self.str_name else ""
+
+    @classmethod
+    def from_dict(cls, tag_data):
+        """
+        Reads a tag back from a .tki file
+
+        :param dict tag_data: The tag, as written by to_dict
+        :rtype: Tag
+        """
+        return cls(tag_data["text"], tag_data["id"])
+
+    def __repr__(self):
+        """
+        Returns the full tag description, to be used in the closing metadata
+        """
+        if not self.str_name: return ""
+        return json.dumps(self.to_dict())
+
+    def to_dict(self):
+        """
+        Returns the full tag description as a dictionary
+        """
+        tag_data = {
+            "id"  : self.tag_int,
+            "text": self.str_name
+        }
+        return tag_data
+
+
+class Span:
+    """
+    A span is a duration of time where one encapsulating event was taking place
+    Examples are Winter Vacation, time period, presidency, etc.
+
+    :param int span_id: Individual ID for the span
+    :param datetime start_date: The date that the span begins
+    :param datetime end_date: The date that the span ends
+    :param string title: The title of the span
+    :param Color bgcolor: The background color
+    :param string opacity: How visible the image is behind the color
+    :param Color text_color: Color of the informative text (title, dates, etc.)
+    :param string image: Name of the image to serve as the background
+    :param string image_credit: Any credit that might need to be given for the image
+    """
+    # Show the title and date info in top left corner, 0 - Enabled, 1 - Disabled
+    SHOW_TEXT = 0
+    # How the span appears in the actual timeline
+    # 0 - Image only, 1 - Colored overlay with optional image,
+    # 2 - Colored stage block with optional image
+    STYLE = 2
+    # Whether to show the color/image of the span in the slider, # 0 - Disabled, 1 - Enabled
+    SHOW_IN_SLIDER = 1
+    __slots__ = ("id", "start_date", "end_date", "title", "bgimage", "bgcolor", "opacity", "text_color")
+
+    def __init__(self, span_id, start_date, end_date, title, bgcolor, opacity, text_color, image="", image_credit=""):
+        self.id = span_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.title = title
+        self.bgimage = Media(image, media_credit = image_credit) if image or image_credit else Media.EMPTY
+        self.bgcolor = bgcolor
+        self.opacity = opacity
+        self.text_color = text_color
+
+    @classmethod
+    def from_dict(cls, span_data):
+        """
+        Reads a span back from a .tki file, keeping its image as it is
+
+        :param dict span_data: The span, as written by to_dict
+        :rtype: Span
+        :raises ValueError: If a date or color isn't valid
+        """
+        span = cls(span_data["id"], parse_tki_date(span_data["start"])[0], parse_tki_date(span_data["end"])[0],
+                   span_data.get("title", ""), Color(span_data["color"]), span_data.get("opacity", ""),
+                   Color(span_data["textColor"]))
+        span.bgimage = Media.from_dict({"src": span_data.get("image", ""), "type": "Image",
+                                        "mediaDataUri": span_data.get("imageDataUri", "")},
+                                       span_data.get("imageCredit", ""))
+        return span
+
+    def __repr__(self):
+        """
+        Returns the span as a string that is friendly with Tiki-Toki software
+        """
+        return json.dumps(self.to_dict())
+
+    def to_dict(self, media_cache=None):
+        """
+        Returns the span as a dictionary, to be used in the closing metadata
+
+        :param MediaCache media_cache: Optional- The cache the image is written with, Media.CACHE if not given
+        """
+        span_data = {
+            "id"          : self.id,
+            "start"       : format_date(self.start_date),
+            "end"         : format_date(self.end_date),
+            "title"       : self.title,
+            "image"       : self.bgimage.source(media_cache),
+            "imageDataUri": str(self.bgimage.data_uri(media_cache)),
+            "imageCredit" : self.bgimage.media_credit,
+            "color"       : str(self.bgcolor),
+            "opacity"     : str(self.opacity),
+            "textColor"   : str(self.text_color),
+            "showText"    : Span.SHOW_TEXT,
+            "style"       : Span.STYLE,
+            "showInSlider": Span.SHOW_IN_SLIDER
+        }
+        return span_data
+
+
+class MediaCache:
+    """
+    Holds the base64 data URIs of media files, so each file is only read and encoded once.
+    Files are identified by their path, modification time, and size, so an edited file is encoded again.
+    The most recently used encodings are kept in memory, and optionally stored in a directory between runs.
+    Images can also be optimized before being encoded, in which case the optimized images are what is kept.
+    Instead of being embedded, images can be written to a directory once for each distinct content and linked to,
+    so an image used by many events only takes up space once.
+
+    :param int max_entries: How many encodings are kept in memory
+    :param string cache_dir: Optional- The directory where encodings are stored between runs
+    :param int max_bytes: How many characters of encodings are kept in memory, however few entries that is
+    :param ImageOptimizer optimizer: Optional- How images are optimized before they are encoded
+    :param string media_dir: Optional- The directory images are written to instead of being embedded
+    :param string media_url: Optional- Where the images in media_dir are linked from, media_dir as a file:// URL
+        if not given
+    """
+    # How many files are read at once when preparing them, enough to hide the wait for each on slow storage
+    PREPARE_THREADS = 16
+    # The caches of for_options by their options, so each process keeps one for every set of options used
+    INSTANCES = {}
+
+    def __init__(self, max_entries=256, cache_dir=None, max_bytes=64 * 1024 * 1024, optimizer=None, media_dir=None,
+                 media_url=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.optimizer = optimizer
+        self.media_dir = media_dir
+        self.media_url = media_url
+        self.entries = OrderedDict()
+        self.size = 0
+        # Files are prepared in several threads at once, see prepare
+        self.lock = threading.Lock()
+        # The link to each image written to media_dir, by its key
+        self.urls = {}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok = True)
+        if self.media_dir:
+            os.makedirs(self.media_dir, exist_ok = True)
+            if not self.media_url:
+                self.media_url = pathlib.Path(os.path.abspath(self.media_dir)).as_uri()
+
+    @classmethod
+    def for_options(cls, cache_dir=None, optimizer=None, media_dir=None, media_url=None):
+        """
+        Gets the shared cache for a set of options, creating it the first time they are used
+
+        :param string cache_dir: Optional- The directory where encodings are stored between runs
+        :param ImageOptimizer optimizer: Optional- How images are optimized before they are encoded
+        :param string media_dir: Optional- The directory images are written to instead of being embedded
+        :param string media_url: Optional- Where the images in media_dir are linked from
+        :rtype: MediaCache
+        """
+        # Optimizers are compared by their settings, since each copy sent to a worker process is a new object
+        options = (cache_dir, optimizer and optimizer.key() + optimizer.key(True), media_dir, media_url)
+        if options not in cls.INSTANCES:
+            cls.INSTANCES[options] = cls(cache_dir = cache_dir, optimizer = optimizer, media_dir = media_dir,
+                                         media_url = media_url)
+        return cls.INSTANCES[options]
+
+    @staticmethod
+    def fingerprint(path):
+        """
+        Identifies the current contents of a file without reading it
+
+        :param string path: The path of the media file
+        :rtype: tuple
+        :return: The absolute path, modification time, and size of the file
+        :raises FileNotFoundError: If the file doesn't exist
+        """
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def get_data_uri(self, path, thumbnail=False):
+        """
+        Gets the data URI of a media file, encoding it only if it isn't already cached
+
+        :param string path: The path of the media file
+        :param bool thumbnail: Whether the image is the thumbnail of an audio file, which the optimizer may shrink more
+        :rtype: string
+        :return: Base64 data URI of the file
+        :raises FileNotFoundError: If the file doesn't exist
+        """
+        key = self.key(path, thumbnail)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        # Encoded outside the lock, so other threads can encode other files meanwhile
+        data_uri = self.encode(path, key, thumbnail)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = data_uri
+                self.size += len(data_uri)
+            # Forgets the least recently used encodings, but always keeps the one just used
+            while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                self.size -= len(self.entries.popitem(last = False)[1])
+        return data_uri
+
+    def key(self, path, thumbnail=False):
+        """
+        :param string path: The path of the media file
+        :param bool thumbnail: Whether the image is the thumbnail of an audio file
+        :rtype: tuple
+        :return: What the encoding of the file is cached under, which changes with the file and the optimization
+        :raises FileNotFoundError: If the file doesn't exist
+        """
+        key = self.fingerprint(path)
+        if self.optimizer is not None:
+            key += self.optimizer.key(thumbnail)
+        return key
+
+    def encode(self, path, key, thumbnail=False):
+        """
+        Encodes a media file, or reads its encoding from the cache directory
+
+        :param string path: The path of the media file
+        :param tuple key: The key of the file, see key()
+        :param bool thumbnail: Whether the image is the thumbnail of an audio file
+        :rtype: string
+        :return: Base64 data URI of the file
+        """
+        stored_path = self.stored_path(key)
+        if stored_path:
+            if os.path.isfile(stored_path):
+                with open(stored_path, encoding = "utf-8") as stored_file:
+                    return stored_file.read()
+        with open(path, "rb") as media_file:
+            data = media_file.read()
+        if self.optimizer is not None:
+            data = self.optimizer.optimize(data, thumbnail)
+        data_uri = "data:image/" + Media.IMAGE_EXTENSION + ";base64," + base64.b64encode(data).decode("ascii")
+        if stored_path:
+            # Writes to a temporary file first, so an interrupted run never leaves a partial encoding
+            # Other processes may be encoding the same file, so each writes to its own temporary file
+            file_descriptor, temporary_path = tempfile.mkstemp(".tmp", dir = os.path.dirname(stored_path))
+            with os.fdopen(file_descriptor, "w", encoding = "utf-8") as stored_file:
+                stored_file.write(data_uri)
+            os.replace(temporary_path, stored_path)
+        return data_uri
+
+    def get_url(self, path):
+        """
+        Gets the link to an image in media_dir, writing it there only if no image with the same content is
+        Images are named after the hash of their content, so identical images are only written once, even
+        if they have different names
+
+        :param string path: The path of the image
+        :rtype: string
+        :return: The URL of the image
+        :raises FileNotFoundError: If the file doesn't exist
+        """
+        key = self.key(path)
+        if key not in self.urls:
+            # Goes through the encoding, so the image is only optimized once and the cache directory is used
+            data = base64.b64decode(self.encode(path, key).split(",", 1)[1])
+            name = hashlib.sha1(data).hexdigest() + "." + Media.IMAGE_EXTENSION
+            stored_path = os.path.join(self.media_dir, name)
+            if not os.path.isfile(stored_path):
+                # Other processes may be writing the same image, so each writes to its own temporary file
+                file_descriptor, temporary_path = tempfile.mkstemp(".tmp", dir = self.media_dir)
+                with os.fdopen(file_descriptor, "wb") as stored_file:
+                    stored_file.write(data)
+                # Temporary files are only readable by their owner, but the images are meant to be served
+                os.chmod(temporary_path, 0o644)
+                os.replace(temporary_path, stored_path)
+            self.urls[key] = self.media_url.rstrip("/") + "/" + name
+        return self.urls[key]
+
+    def stored_path(self, key):
+        """
+        :param tuple key: The key of a file, see key()
+        :rtype: string
+        :return: Where the encoding of the file is kept in the cache directory, None without one
+        """
+        if not self.cache_dir: return None
+        return os.path.join(self.cache_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".b64")
+
+    def prepare(self, media_files):
+        """
+        Reads and encodes media files ahead of the timeline being written, several at once
+        Where each read waits on the storage, such as a network drive, reading the files one at a time while the
+        timeline is written is slow, so a bounded pool of threads reads them together instead. Only done when the
+        results can be stored, in the cache directory or as linked images. Otherwise, the media is read a few
+        events ahead as the timeline is written, see prefetched
+
+        :param set media_files: Each file as a tuple of its path and whether it is the thumbnail of an audio file
+        """
+        if not (self.cache_dir or self.media_dir): return
+        with ThreadPoolExecutor(max_workers = MediaCache.PREPARE_THREADS) as pool:
+            for path, thumbnail in media_files:
+                if path:
+                    pool.submit(self.store, path, thumbnail)
+
+    def store(self, path, thumbnail=False):
+        """
+        Writes a linked image to the media directory, or the encoding of a file to the cache directory,
+        unless it is already there
+
+        :param string path: The path of the media file
+        :param bool thumbnail: Whether the image is the thumbnail of an audio file
+        """
+        try:
+            if self.media_dir and not thumbnail:
+                self.get_url(path)
+            elif self.cache_dir:
+                key = self.key(path, thumbnail)
+                if not os.path.isfile(self.stored_path(key)):
+                    self.encode(path, key, thumbnail)
+        # Left to when the media is written, which reports the error as it always has
+        except OSError:
+            pass
+
+    def prefetched(self, events):
+        """
+        Goes through the events, reading and encoding the media of the next few ahead in a pool of threads
+        Only a few events ahead are read, so the encodings held at once stay within what the cache keeps
+
+        :param events: The events, such as an EventSorter
+        :rtype: generator
+        :return: The same events, in the same order, each once its media is encoded
+        """
+        upcoming = deque()
+        with ThreadPoolExecutor(max_workers = MediaCache.PREPARE_THREADS) as pool:
+            for event in events:
+                media = event.media
+                future = pool.submit(self.preload, media) if media and media.media_file else None
+                upcoming.append((event, future))
+                if len(upcoming) > MediaCache.PREPARE_THREADS:
+                    yield self.wait(*upcoming.popleft())
+            while upcoming:
+                yield self.wait(*upcoming.popleft())
+
+    @staticmethod
+    def wait(event, future):
+        """
+        :param Event event: An event whose media may still be being read
+        :param Future future: Optional- The reading of its media
+        :rtype: Event
+        :return: The event, once its media is read
+        """
+        if future is not None:
+            future.result()
+        return event
+
+    def preload(self, media):
+        """
+        Encodes a media object ahead of it being written, or writes it to the media directory if it is linked
+
+        :param Media media: The media, which must have a file
+        """
+        try:
+            if media.is_linked(self):
+                self.get_url(media.media_file)
+            else:
+                self.get_data_uri(media.media_file, thumbnail = media.media_type == "Audio")
+        # Left to when the media is written, which reports the error as it always has
+        except OSError:
+            pass
+
+
+class ImageOptimizer:
+    """
+    Shrinks images before they are embedded, by downscaling them to fit within a size and saving them again as JPEG
+    Images are turned the right way up first, since the orientation saved by cameras is lost when saving again.
+    Needs Pillow
+
+    :param tuple max_size: Optional- The largest width and height of an image
+    :param int quality: The JPEG quality the images are saved with, 1 - 95
+    :param tuple thumb_size: Optional- The largest width and height of the thumbnails of audio files, max_size if
+        not given
+    """
+
+    def __init__(self, max_size=None, quality=85, thumb_size=None):
+        self.max_size = tuple(max_size) if max_size else None
+        self.quality = quality
+        self.thumb_size = tuple(thumb_size) if thumb_size else self.max_size
+
+    def key(self, thumbnail=False):
+        """
+        :param bool thumbnail: Whether the image is the thumbnail of an audio file
+        :rtype: tuple
+        :return: The settings an image is optimized with, to tell apart cached images optimized differently
+        """
+        return "optimized", self.thumb_size if thumbnail else self.max_size, self.quality
+
+    def optimize(self, data, thumbnail=False):
+        """
+        :param bytes data: The contents of the image file
+        :param bool thumbnail: Whether the image is the thumbnail of an audio file
+        :rtype: bytes
+        :return: The optimized image, or the original if it is smaller or can't be read as an image
+        """
+        max_size = self.thumb_size if thumbnail else self.max_size
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = ImageOps.exif_transpose(image)
+                if max_size:
+                    image.thumbnail(max_size, Image.LANCZOS)
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                optimized = io.BytesIO()
+                image.save(optimized, "JPEG", quality = self.quality, optimize = True, progressive = True)
+        except OSError as error:
+            print("Embedding an image as it is, since it can't be optimized: {}".format(error))
+            return data
+        return min(optimized.getvalue(), data, key = len)
+
+
+class Media:
+    r"""
+    A media object is either an image or an audio file.
+
+    A few assumptions are made about media files:
+        - All image files are .jpg, all audio files are .mp3
+        - All media files are stored in ``\res``
+        - For audio files, the thumbnail has the same name as the audio, but with the .jpg extension
+
+    A media object is intended to be used in 2 different ways:
+        ``Media(media_name, media_caption, media_thumb_position, media_id)``
+            - This generates a media object with a filename, caption, and thumb position
+        ``Media(media_name, media_credit)``
+            - Intended to be used for images only
+            - Used in places not in a timeline event, such as for spans or the intro
+
+    :param string media_name: The filename of the media
+    :param int media_id: Individual ID for the media - only used for media in event data
+    :param string media_caption: Short sentence to describe the picture
+    :param string media_thumb_position: Positioning of thumbnail when in smaller frames, default "0,0"
+    :param string media_type: Either "Image" or "Audio"
+    :param string media_file: The path of the image that is encoded, the thumbnail for audio files
+    :param string media_credit: Credit given for the image
+    :param bool check_file: Whether an audio file must be there too, not only its thumbnail - only for media in event
+        data, since audio anywhere else, such as in a span or the intro, is only shown by its thumbnail
+
+    Media with no file, such as the image of a span without one, can be the shared Media.EMPTY instead of its own
+
+    .. note:: Due to limitations of the Chrome app sandbox, audio files must be selected via the file browser
+        directly in Tiki-Toki. An audio media object will generate all the correct code, but you will
+        have to reload the audio file once you are in the software
+    """
+    IMAGE_EXTENSION = "jpg"
+    AUDIO_EXTENTION = "mp3"
+
+    # What media written without a cache of its own is encoded with, the same one as builders with default options
+    CACHE = MediaCache.for_options()
+    # Without a __dict__, each media object takes up much less memory
+    __slots__ = ("media_name", "media_id", "media_caption", "media_thumb_position", "media_type", "media_file",
+                 "media_credit", "stored_data_uri")
+
+    # Each media cell is stored as
+    # Medianame: Caption: thumbPosition(optional)
+    def __init__(self, media_name="", media_caption="", media_thumb_position="0,0", media_id=0, media_credit="",
+                 check_file=False):
+        self.media_name = media_name
+        self.media_id = media_id
+        self.media_caption = media_caption
+        self.media_type = self.get_media_type()
+        # Only the path is kept, the file is encoded when the media is written
+        # Found before the thumb position is checked, so a missing file is reported as such
+        self.media_file = self.get_media_file(check_file)
+        self.media_thumb_position = self.format_thumb_position(media_thumb_position)
+        self.media_credit = media_credit
+        # The data URI of media read back from a .tki file, which is written as it is instead of encoding a file
+        self.stored_data_uri = None
+
+    @classmethod
+    def from_dict(cls, media_data, media_credit=""):
+        """
+        Reads media back from a .tki file, keeping its data URI as it is, so the file isn't needed or encoded again
+
+        :param dict media_data: The media, as written by to_dict
+        :param string media_credit: Optional- Credit given for the image
+        :rtype: Media
+        """
+        media = cls.__new__(cls)
+        media_src = media_data.get("src", "")
+        media.media_name = media_src[len("LocalFile://"):] if media_src.startswith("LocalFile://") else media_src
+        media.media_id = media_data.get("id", 0)
+        media.media_caption = media_data.get("caption", "")
+        media.media_thumb_position = media_data.get("thumbPosition", "0,0")
+        media.media_type = media_data.get("type", "")
+        media.media_file = ""
+        media.media_credit = media_credit
+        media.stored_data_uri = media_data.get("mediaDataUri", "")
+        return media
+
+    @property
+    def external_media_thumb(self):
+        """
+        ``LocalFile://"audio thumbnail name"`` for audio files, blank otherwise
+        Worked out when asked for, rather than kept for every media object
+        """
+        if self.media_type != "Audio": return ""
+        # Strips the .mp3 from the file name, and append .jpg
+        return self.media_name.rsplit(".", 1)[0] + "." + Media.IMAGE_EXTENSION
+
+    @property
+    def external_media_type(self):
+        """
+        "file" for audio files, blank otherwise
+        """
+        return "file" if self.media_type == "Audio" else ""
+
+    @property
+    def media_data_uri(self):
+        """
+        The base64 encoding of the media with Media.CACHE, see data_uri
+        """
+        return self.data_uri()
+
+    def is_linked(self, cache=None):
+        """
+        Whether the media is an image that is linked to instead of embedded, see MediaCache
+        The thumbnails of audio files are always embedded, since Tiki-Toki only looks for them by name
+
+        :param MediaCache cache: Optional- The cache the media is written with, Media.CACHE if not given
+        :rtype: bool
+        """
+        cache = cache if cache is not None else Media.CACHE
+        return bool(cache.media_dir and self.media_file and self.media_type == "Image")
+
+    def source(self, cache=None):
+        """
+        :param MediaCache cache: Optional- The cache the media is written with, Media.CACHE if not given
+        :rtype: string
+        :return: Where the media is found, the file name unless the image is linked to
+        """
+        cache = cache if cache is not None else Media.CACHE
+        return cache.get_url(self.media_file) if self.is_linked(cache) else self.media_name
+
+    def data_uri(self, cache=None):
+        """
+        The base64 encoding of the media, which prevents the need for a filepath
+        Encoded when asked for, so the encodings of a whole timeline are never held at once
+
+        :param MediaCache cache: Optional- The cache the media is written with, Media.CACHE if not given
+        :rtype: string
+        :return: The data URI, blank for images that are linked to
+        """
+        if self.stored_data_uri is not None: return self.stored_data_uri
+        cache = cache if cache is not None else Media.CACHE
+        if not self.media_file or self.is_linked(cache): return ""
+        return cache.get_data_uri(self.media_file, thumbnail = self.media_type == "Audio")
+
+    def __repr__(self):
+        """
+        Turns media object into string compatible with the software.
+        Only valid when using with the event data
+        """
+        if not self.media_name: return '""'
+        return json.dumps(self.to_dict())
+
+    def to_dict(self, cache=None):
+        """
+        Turns media object into a dictionary compatible with the software.
+        Only valid when using with the event data
+
+        :param MediaCache cache: Optional- The cache the media is written with, Media.CACHE if not given
+        """
+        media_src = self.source(cache)
+        # Appends LocalFile:// to the media source if the file is Audio
+        if self.media_type == "Audio":
+            media_src = "LocalFile://" + media_src
+        media_data = {
+            "id"                : self.media_id,
+            "src"               : media_src,
+            "caption"           : self.media_caption,
+            "type"              : self.media_type,
+            "thumbPosition"     : self.media_thumb_position,
+            "externalMediaThumb": self.external_media_thumb,
+            "externalMediaType" : self.external_media_type,
+            "externalMediaId"   : self.external_media_type,
+            "orderIndex"        : 10,
+            "mediaDataUri"      : self.data_uri(cache),
+            "bookmarkData"      : ""
+        }
+        return media_data
+
+    def get_media_type(self):
+        """
+        Compares file extension of the media to preset file extensions.
+
+        :rtype: string
+        :return: The media type, either 'Image' or 'Audio'
+        :raises IndexError: If the file has no extension
+        :raises ValueError: If the file extension is not one of the defined extensions
+        """
+        if not self.media_name: return ""
+        try:
+            media_ext = self.media_name.rsplit(".", 1)[1]
+        except IndexError:
+            raise IndexError("A valid file has a file extension")
+        if media_ext == Media.IMAGE_EXTENSION:
+            return "Image"
+        elif media_ext == Media.AUDIO_EXTENTION:
+            return "Audio"
+        else:
+            raise ValueError("{} is not a valid file format".format(media_ext))
+
+    def format_thumb_position(self, thumb_pos):
+        """
+        Checks that thumb position argument was given in the form (float,float), and that they are in bounds [-1,1]
+
+        :rtype: String
+        :return: "x,y" , where x and y are floats
+        :raises ValueError: if x or y are not between -1 and 1
+        """
+        if not thumb_pos:
+            return "0,0"
+        try:
+            # Assigns the values to xpos and ypos
+            xpos, ypos = thumb_pos.replace(' ', '').split(',')
+            if not -1 <= float(xpos) <= 1:
+                raise ValueError("x position is out of range")
+            if not -1 <= float(ypos) <= 1:
+                raise ValueError("y position is out of range")
+        except ValueError as error:
+            raise error
+        # Most media share a few positions, so each is only held once
+        return sys.intern("{},{}".format(xpos, ypos))
+
+    def get_media_file(self, check_file=False):
+        """
+        Finds the image that is encoded for the media, assuming it is in a folder named "res"
+        If type is audio, looks for thumbnail with the same name, different extension
+
+        :param bool check_file: Whether to check that the audio file is there too
+        :rtype: string
+        :return: The path of the image, blank if there is no media
+        :raises FileNotFoundError: If the image, or with check_file the audio file, doesn't exist
+        """
+        if self.media_type == "Image":
+            media_file = os.path.join("res", self.media_name)
+            if not os.path.isfile(media_file):
+                raise FileNotFoundError('Can\'t find the media file "{}"'.format(self.media_name))
+        elif self.media_type == "Audio":
+            if check_file and not os.path.isfile(os.path.join("res", self.media_name)):
+                raise FileNotFoundError('Can\'t find the media file "{}"'.format(self.media_name))
+            media_file = os.path.join("res", self.external_media_thumb)
+            if not os.path.isfile(media_file):
+                raise FileNotFoundError(
+                        "Audio file \"{}\" doesn't have accompanying thumbnail.".format(self.media_name))
+        else:
+            media_file = ""
+        return media_file
+
+
+# Shared by everything that has no media, rather than each having its own empty media object
+Media.EMPTY = Media()
+
+
+class Color:
+    """
+    A three or six digit hexadecimal number used as a color code.
+    Allows for a universal way to check if color codes are valid.
+    Used everywhere a color is defined for an entity.
+    """
+    __slots__ = ("color",)
+
+    def __init__(self, color):
+        self.color = color
+        # Matches valid color codes, excluding codes of only 2 characters
+        if re.match('^#?(?:[0-9a-fA-F]{3}){1,2}$', color) is None:
+            raise ValueError(color + " is not a valid color code")
+
+    def __repr__(self):
+        return self.color
+
+
+class Setting:
+    """
+    The type of a setting in the Other section of the settings file, and the values it can have
+    A setting can always be left blank, which leaves it to Tiki-Toki
+
+    :param type value_type: str, int, or float for any number, "image" for an image name and credit separated by a
+        comma, or None to read numbers as numbers and anything else as text
+    :param tuple options: Optional- The only values the setting can have
+    :param tuple value_range: Optional- The lowest and highest number the setting can be, either None for no limit
+    :param string pattern: Optional- A regular expression that values which aren't one of the options must match
+    :param bool required: Whether the settings file must give the setting
+    """
+
+    def __init__(self, value_type=str, options=None, value_range=None, pattern=None, required=False):
+        self.value_type = value_type
+        self.options = options
+        self.value_range = value_range
+        self.pattern = pattern
+        self.required = required
+
+    def parse(self, name, value):
+        """
+        :param string name: The name of the setting, for the error messages
+        :param string value: The value as written in the settings file
+        :rtype: string, int, float, or Media
+        :return: The value as its type
+        :raises ValueError: If the value can't be the setting's
+        :raises FileNotFoundError: If the setting is an image that doesn't exist
+        """
+        if self.value_type == "image":
+            # The credit can be left out
+            image, credit = (re.split("\\s*,\\s*", value, 1) + [""])[:2]
+            return Media(image, media_credit = credit) if image or credit else Media.EMPTY
+        if value == "":
+            return value
+
+        if self.value_type is str:
+            if self.options and value not in self.options and not (self.pattern and re.match(self.pattern, value)):
+                raise ValueError("{} can't be {}, it must be one of {}".format(name, value, ", ".join(self.options)))
+            return value
+        try:
+            value = float(value) if "." in value else int(value)
+        except ValueError:
+            if self.value_type is None:
+                return value
+            raise ValueError("{} must be a number, not {}".format(name, value))
+        if self.value_type is int and isinstance(value, float):
+            raise ValueError("{} must be a whole number, not {}".format(name, value))
+        if self.options and value not in self.options:
+            raise ValueError("{} can't be {}, it must be one of {}".format(
+                    name, value, ", ".join(str(option) for option in self.options)))
+        if self.value_range:
+            lowest, highest = self.value_range
+            if (lowest is not None and value < lowest) or (highest is not None and value > highest):
+                raise ValueError("{} must be from {} to {}, not {}".format(
+                        name, "any" if lowest is None else lowest, "any" if highest is None else highest, value))
+        return value
+
+
+# The settings of the Other section that are checked, anything else is read as it is
+# The zoom levels are the units shown, from most zoomed out to in, with the sizes each unit can be
+SETTINGS_SCHEMA = {
+    "title"                : Setting(str, required = True),
+    "introText"            : Setting(str),
+    "aboutText"            : Setting(str),
+    "backgroundImage"      : Setting("image", required = True),
+    "introImage"           : Setting("image", required = True),
+    "zoom"                 : Setting(str, tuple(
+            "{}-{}-{}".format(unit, size, subunit) for unit, subunit, sizes in (
+                ("decade", "year", ("medium", "large")),
+                ("year", "month", ("tiny", "small", "medium", "large", "very-large")),
+                ("month", "day", ("tincy", "tiny", "small", "medium"))) for size in sizes)),
+    # Or the ID of an event, in quotes
+    "initialFocus"         : Setting(str, ("first", "last", "today"), pattern = '^"\\d+"$'),
+    "dontDisplayIntroPanel": Setting(int, (0, 1)),
+    "storySpacing"         : Setting(int, value_range = (0, 10)),
+    "viewType"             : Setting(int, (0, 1, 2, 3)),
+    "displayStripes"       : Setting(int, (0, 1)),
+    "lightboxStyle"        : Setting(int, (0, 1, 2)),
+    "showControls"         : Setting(int, (0, 1)),
+    "lazyLoading"          : Setting(int, (0, 1)),
+    "3Dstatus"             : Setting(int, (0, 1, 2), required = True),
+    "3Dzoom"               : Setting(float, value_range = (0, None), required = True),
+    "3Dpanelsize"          : Setting(int, value_range = (1, None), required = True),
+    "3Dvanishpoint"        : Setting(float, required = True),
+    "3Dtimelinewidth"      : Setting(float, value_range = (0, None), required = True),
+    "3Ddirection"          : Setting(int, (0, 1), required = True),
+    "3Dsections"           : Setting(int, value_range = (1, 9), required = True),
+    "3Dbgimageopacity"     : Setting(float, value_range = (0, 1), required = True),
+}